@@ -1,11 +1,10 @@
-import pandas as pd
-from pandas.api import types as ptypes
 from pathlib import Path
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from PIL import Image, ImageTk
 from tkinter import Tk, Canvas, Button, PhotoImage, Label
 import mplcursors as mpc
+from vycarb.datalog_cache import load_workbook
 
 
 
@@ -147,51 +146,15 @@ window.resizable(False, False)
 
 ##PLOTING UGHHH
 
-# Load
+# Load (columns come from datalog_cache.SCHEMA; parsed once, then served from .datalog_cache/)
 excel_path = Path(__file__).parent / "RPI_Sensor_datalogs.xlsx"
-all_sheets = pd.read_excel(excel_path, sheet_name=None)
 
-sheets = {}
-for name, df in all_sheets.items():
-    # Rename 
-    if "Unnamed: 1" in df.columns:
-        df.rename(columns={"Unnamed: 1": "timestamp"}, inplace=True)
-
-        # Drop embedded header row inside data
-        if isinstance(df["timestamp"].iloc[0], str) and "timestamp" in df["timestamp"].iloc[0].lower():
-            df = df.drop(index=0).reset_index(drop=True)
-
-        # Convert to datetime
-        df["datetime"] = pd.to_datetime(df["timestamp"], errors="coerce")
-
-    sheets[name] = df
-
-# this cleans up sheets and renames columns for easier access because they were named the wrong things in the csv file 
-reactor = sheets["reactor_raw_data"].copy()
-reactor.rename(columns={"Unnamed: 3": "flow"}, inplace=True)
-
-doser = sheets["doser_raw_data"].copy()
-doser.rename(columns={"Unnamed: 3": "dosing_rate"}, inplace=True)
-
-di1_raw = sheets["di-sea_1_raw_data"].copy()
-di1_raw = di1_raw.drop(index=0).reset_index(drop=True)
-di1_raw.rename(columns={"Unnamed: 4": "ph", "Unnamed: 1": "timestamp"}, inplace=True)
-di1_raw["datetime"] = pd.to_datetime(di1_raw["timestamp"], errors="coerce")
-
-di2_raw = sheets["di-sea_2_raw_data"].copy()
-di2_raw = di2_raw.drop(index=0).reset_index(drop=True)
-di2_raw.rename(columns={"Unnamed: 4": "ph", "Unnamed: 1": "timestamp"}, inplace=True)
-di2_raw["datetime"] = pd.to_datetime(di2_raw["timestamp"], errors="coerce")
-
-di1_proc = sheets["di-sea_1_processed_data"].copy()
-di1_proc = di1_proc.drop(index=0).reset_index(drop=True)
-di1_proc.rename(columns={"Unnamed: 4": "ph", "Unnamed: 1": "timestamp"}, inplace=True)
-di1_proc["datetime"] = pd.to_datetime(di1_proc["timestamp"], errors="coerce")
-
-di2_proc = sheets["di-sea_2_processed_data"].copy()
-di2_proc = di2_proc.drop(index=0).reset_index(drop=True)
-di2_proc.rename(columns={"Unnamed: 4": "ph", "Unnamed: 1": "timestamp"}, inplace=True)
-di2_proc["datetime"] = pd.to_datetime(di2_proc["timestamp"], errors="coerce")
+data = load_workbook(excel_path)
+reactor = data["reactor_raw_data"]
+doser = data["doser_raw_data"]
+di1_raw, di1_proc = data["di-sea_1_raw_data"], data["di-sea_1_processed_data"]
+di2_raw, di2_proc = data["di-sea_2_raw_data"], data["di-sea_2_processed_data"]
+ve = data["ve_direct_raw_data"]
 
 # Embed helper
 def embed_figure(fig, x, y, w, h):
@@ -211,9 +174,6 @@ def embed_figure(fig, x, y, w, h):
 
 #Plotting UGHHHH
 
-di1_raw.rename(columns={"Unnamed: 7": "co2", "Unnamed: 9": "ec"}, inplace=True)
-di2_raw.rename(columns={"Unnamed: 7": "co2", "Unnamed: 9": "ec"}, inplace=True)
-
 # DI-SEA 1 CO₂ (raw & processed)
 fig1_co2 = Figure(dpi=80)
 ax1_co2 = fig1_co2.add_subplot(111)
@@ -301,23 +261,6 @@ canvas.create_text(
 )
 
 # 2) Total Solar Yield 
-ve = sheets["ve_direct_raw_data"].copy()
-
-# If the first row is a stray header, drop it
-if isinstance(ve["timestamp"].iloc[0], str) and "timestamp" in ve["timestamp"].iloc[0].lower():
-    ve = ve.drop(index=0).reset_index(drop=True)
-
-# Identify which column header contains the word "yield"
-header_row = all_sheets["ve_direct_raw_data"].iloc[0]
-yield_col = next((col for col, val in header_row.items()
-                  if "yield" in str(val).lower()), None)
-
-# Renames the column to something we can reference
-if yield_col:
-    ve.rename(columns={yield_col: "total_solar_yield"}, inplace=True)
-else:
-    ve["total_solar_yield"] = float("nan")
-
 # Grab the last total‐yield value
 total_yield = float(ve["total_solar_yield"].iloc[-1])
 
@@ -0,0 +1,250 @@
+"""Headless benchmark of the live path: ZMQ receive -> route -> render.
+
+Runs the real Receiver, Router and LiveLines of newterminal.py against an
+in-process PUB socket, with Agg canvases instead of a Tk window (no display
+or Xvfb needed), and drives them the way Tk would: a router step every
+POLL_MS and a render frame every 1/RENDER_FPS.
+
+    python bench.py --duration 60 --rate 5000 --out bench.json
+    python bench.py --xlsx RPI_Sensor_datalogs.xlsx --compare bench.json
+
+Reports routed throughput, ingest-to-draw latency (receive until the frame
+that shows the sample has been rendered), per-widget render times and RSS
+growth, and stores them as JSON; --compare prints the change against an
+earlier run.
+"""
+
+import argparse
+import itertools
+import json
+import math
+import os
+import resource
+import sys
+import threading
+import time
+
+import matplotlib
+matplotlib.use("Agg")
+
+import numpy as np
+import zmq
+
+from newterminal import CONFLATE_TOPICS, POLL_MS, build_plots
+from vycarb import decoder
+from vycarb.feed import Receiver
+from vycarb.render import RenderScheduler, RENDER_FPS
+from vycarb.router import Router
+
+ENDPOINT = "inproc://bench"
+
+
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:     # not Linux: peak RSS is the best we have (KiB on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def percentiles(values, *ps):
+    if not len(values):
+        return {f"p{p}": None for p in ps}
+    arr = np.asarray(values)
+    return {f"p{p}": round(float(np.percentile(arr, p)), 3) for p in ps}
+
+
+def build_widgets(blit=True):
+    """newterminal.py's mini-plots and plot routes, on headless canvases."""
+    scheduler = RenderScheduler(None)
+    lines, routes = build_plots(None, scheduler, blit)
+    for line in lines.values():
+        line.canvas.draw()
+    return lines, routes, scheduler
+
+
+def synthetic_messages(seed=0):
+    """Endless simulator-shaped traffic: (device, message), one device after another."""
+    rng = np.random.default_rng(seed)
+    t0 = time.time()
+    for i in itertools.count():
+        t = t0 + i * 0.1
+        w = math.sin(i / 500)
+        yield "di-sea", {"di-sea_1": {"temp": 20 + w, "air_temp": 22 + w, "psi": 30 + rng.normal(), "ph": 7 + 0.2 * w,
+                                      "co2": 400 + 20 * w, "cycle": 1 + i // 100_000},
+                         "di-sea_2": {"temp": 21 - w, "air_temp": 22 - w, "psi": 31 + rng.normal(), "ph": 7 - 0.2 * w,
+                                      "co2": 410 - 20 * w, "cycle": 1 + i // 100_000}}, t
+        yield "doser", {"dosing_rate": 1.5 + 0.1 * rng.normal()}, t
+        yield "reactor", {"flow": 1000 + 50 * w}, t
+        yield "battery", {"soc": 80 + 10 * w}, t
+        yield "ve_direct", {"yield_total": i / 10}, t
+
+
+def message_frames(device, obj, encoding=None):
+    return ([f"data|{json.dumps(obj)}".encode()] if encoding is None
+            else decoder.encode(f"data.{device}", obj, encoding))
+
+
+def synthetic_frames(encoding=None):
+    for device, data, t in synthetic_messages():
+        obj = {"device_name": device, "msg_type": "data", "status": "ok", "timestamp": t, "data": data}
+        yield t, message_frames(device, obj, encoding)
+
+
+def datalog_frames(excel_path, encoding=None):
+    """The datalogs over and over; each pass is shifted by the span of the data, so time only moves forward."""
+    from replay import datalog_messages
+    messages = [(t, device, obj["data"]) for t, device, obj in datalog_messages(excel_path)]
+    span = messages[-1][0] - messages[0][0] + 1
+    for k in itertools.count():
+        for t, device, data in messages:
+            t += k * span
+            obj = {"device_name": device, "msg_type": "data", "status": "ok", "timestamp": t, "data": data}
+            yield t, message_frames(device, obj, encoding)
+
+
+def publish(frames, rate, stop):
+    """PUB thread: send `frames` at `rate` msg/s (0 = as fast as possible) until `stop` is set."""
+    sock = zmq.Context.instance().socket(zmq.PUB)
+    sock.setsockopt(zmq.SNDHWM, 100_000)
+    sock.bind(ENDPOINT)
+    time.sleep(0.2)     # let the SUB side connect
+    start = time.perf_counter()
+    for n, (_, f) in enumerate(frames):
+        if stop.is_set():
+            break
+        if rate:
+            ahead = n / rate - (time.perf_counter() - start)
+            if ahead > 0:
+                time.sleep(ahead)
+        sock.send_multipart(f)
+    sock.close(linger=0)
+
+
+def run(duration=30.0, rate=0, encoding=None, xlsx=None, conflate=True, blit=True, warmup=2.0):
+    lines, routes, scheduler = build_widgets(blit)
+    names = {line: name for name, line in lines.items()}
+    conflate_topics = CONFLATE_TOPICS if conflate else []
+    receiver = Receiver(ENDPOINT, ["data", "logs"], conflate=conflate_topics)
+    printed = []
+    router = Router(receiver, routes, on_line=lambda *fields: printed.append(" | ".join(map(str, fields))))
+
+    if xlsx:
+        frames = datalog_frames(xlsx, encoding)
+    else:
+        frames = synthetic_frames(encoding)
+    stop = threading.Event()
+    pub = threading.Thread(target=publish, args=(frames, rate, stop), daemon=True)
+    pub.start()
+    time.sleep(0.1)
+    receiver.start()
+
+    routed = 0
+    latencies, route_ms = [], []
+    render_ms = {name: [] for name in lines}
+    waiting = []                 # receive times routed but not yet on screen
+    rss_start = None
+    frame_s, poll_s = 1 / RENDER_FPS, POLL_MS / 1000
+    t_start = time.perf_counter()
+    next_poll = next_frame = t_start
+    measuring_from = t_start + warmup
+    while True:
+        now = time.perf_counter()
+        if now >= measuring_from + duration:
+            break
+        measuring = now >= measuring_from
+        if measuring and rss_start is None:
+            rss_start = rss_mb()
+            counted = router.totals()        # counts from here on only
+        if now >= next_poll:
+            t0 = time.perf_counter()
+            recv_times = router.step()
+            printed.clear()
+            if measuring:
+                route_ms.append((time.perf_counter() - t0) * 1000)
+                routed += len(recv_times)
+                waiting.extend(recv_times)
+            next_poll += poll_s
+        if now >= next_frame:
+            dirty, scheduler.dirty = scheduler.dirty, {}
+            for line in dirty:
+                t0 = time.perf_counter()
+                line.render()
+                if measuring:
+                    render_ms[names[line]].append((time.perf_counter() - t0) * 1000)
+            drawn = time.perf_counter()
+            latencies.extend((drawn - t) * 1000 for t in waiting)
+            waiting.clear()
+            next_frame += frame_s
+        time.sleep(max(0.0, min(next_poll, next_frame) - time.perf_counter()))
+
+    elapsed = time.perf_counter() - measuring_from
+    stop.set()
+    receiver.stop()
+    receiver.join(timeout=1)
+    pub.join(timeout=1)
+    rss_end = rss_mb()
+    stats = {key: count - counted[key] for key, count in router.totals().items()}
+    return {
+        "config": {"duration_s": duration, "rate": rate, "encoding": encoding or "legacy",
+                   "source": str(xlsx) if xlsx else "synthetic", "conflate": conflate, "blit": blit,
+                   "poll_ms": POLL_MS, "render_fps": RENDER_FPS, "python": sys.version.split()[0],
+                   "time": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "throughput_msg_s": round(routed / elapsed, 1),      # routed; conflated messages never reach the router
+        "received_msg_s": round(stats["received"] / elapsed, 1),
+        "received": stats["received"], "coalesced": stats["coalesced"], "dropped": stats["dropped"],
+        "latency_ms": percentiles(latencies, 50, 99),
+        "route_ms": percentiles(route_ms, 50, 99),
+        "render_ms": {name: {**percentiles(times, 50, 99), "frames": len(times),
+                             "full_redraws": lines[name].full_redraws}
+                      for name, times in render_ms.items()},
+        "rss_mb": {"start": round(rss_start, 1), "end": round(rss_end, 1),
+                   "growth": round(rss_end - rss_start, 1)},
+    }
+
+
+def compare(result, baseline):
+    """Print `metric: old -> new (change)` for every number both runs have."""
+    def flat(d, prefix=""):
+        for k, v in d.items():
+            if k == "config":
+                continue
+            if isinstance(v, dict):
+                yield from flat(v, f"{prefix}{k}.")
+            elif isinstance(v, (int, float)):
+                yield prefix + k, v
+    old = dict(flat(baseline))
+    for key, new in flat(result):
+        if key in old:
+            was = old[key]
+            change = f"{(new - was) / was * 100:+.1f}%" if was else "n/a"
+            print(f"{key:40} {was:>12} -> {new:<12} ({change})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds (after warm-up)")
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--rate", type=float, default=0, help="published msg/s, 0 = as fast as possible")
+    parser.add_argument("--encoding", choices=decoder.ENCODINGS, help="multipart encoding (default: data|{json})")
+    parser.add_argument("--xlsx", help="replay this datalog workbook (looped) instead of synthetic traffic")
+    parser.add_argument("--no-conflate", action="store_true")
+    parser.add_argument("--no-blit", action="store_true")
+    parser.add_argument("--out", help="write the results JSON here")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    result = run(args.duration, args.rate, args.encoding, args.xlsx, not args.no_conflate,
+                 not args.no_blit, args.warmup)
+    print(json.dumps(result, indent=2))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(result, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(result, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
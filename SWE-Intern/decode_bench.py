@@ -0,0 +1,99 @@
+"""Micro-benchmark of the feed decoders on captured traffic.
+
+Decodes the same messages with every installed JSON backend (see
+vycarb/decoder.py JSON_BACKENDS), both as plain dicts (decode) and as the
+typed Readings the GUI uses (decode_reading), and reports the cost per
+message:
+
+    python decode_bench.py recordings/               # recorded sessions
+    python decode_bench.py RPI_Sensor_datalogs.xlsx  # the datalogs, as replay.py sends them
+    python decode_bench.py --count 100000            # synthetic traffic (bench.py)
+
+No ZMQ sockets are involved: this times the decoding alone, the way the
+Receiver thread runs it.
+"""
+
+import argparse
+import itertools
+import json
+import sys
+import time
+from pathlib import Path
+
+from vycarb import decoder
+from vycarb.recorder import read_segments
+
+
+def captured_frames(source=None, count=50_000, encoding=None):
+    """Up to `count` frame lists from a recording, a datalog workbook or synthetic traffic."""
+    if source is None:
+        from bench import synthetic_frames
+        events = synthetic_frames(encoding)
+    elif source.suffix.lower() in (".xlsx", ".xlsm"):
+        from replay import datalog_frames
+        events = datalog_frames(source, encoding)
+    else:
+        events = read_segments(source)
+    return [frames for _, frames in itertools.islice(events, count)]
+
+
+def time_decoder(decode, messages, repeat=5):
+    """Best-of-`repeat` microseconds per message (and the number that failed to decode)."""
+    best, failed = float("inf"), 0
+    for _ in range(repeat):
+        failed = 0
+        start = time.perf_counter()
+        for frames in messages:
+            try:
+                decode(frames)
+            except ValueError:
+                failed += 1
+        best = min(best, time.perf_counter() - start)
+    return best / len(messages) * 1e6, failed
+
+
+def run(messages, backends=decoder.JSON_BACKENDS, repeat=5):
+    results = {}
+    for backend in backends:
+        try:
+            decoder.set_json_backend(backend)
+        except ImportError:
+            print(f"{backend}: not installed, skipped", file=sys.stderr)
+            continue
+        for name, decode in (("decode", decoder.decode), ("decode_reading", decoder.decode_reading)):
+            us, failed = time_decoder(decode, messages, repeat)
+            results[f"{backend}.{name}"] = {"us_per_msg": round(us, 3), "msg_s": round(1e6 / us),
+                                            "failed": failed}
+    decoder.set_json_backend()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", type=Path, nargs="?",
+                        help="recorder segment(s) or datalog .xlsx (default: synthetic traffic)")
+    parser.add_argument("--count", type=int, default=50_000, help="messages to decode (default 50000)")
+    parser.add_argument("--encoding", choices=decoder.ENCODINGS,
+                        help="synthetic/datalogs only: multipart encoding (default: data|{json})")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--out", help="write the results JSON here")
+    args = parser.parse_args(argv)
+
+    messages = captured_frames(args.source, args.count, args.encoding)
+    if not messages:
+        parser.error("no messages to decode")
+    results = run(messages, repeat=args.repeat)
+    baseline = results["json.decode"]["us_per_msg"]
+    print(f"{len(messages)} messages from {args.source or 'synthetic traffic'}")
+    print(f"{'':24} {'us/msg':>8} {'msg/s':>10} {'vs json.decode':>15}")
+    for name, r in results.items():
+        print(f"{name:24} {r['us_per_msg']:>8.2f} {r['msg_s']:>10} {baseline / r['us_per_msg']:>14.2f}x"
+              + (f"  ({r['failed']} failed)" if r["failed"] else ""))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"source": str(args.source or "synthetic"), "messages": len(messages),
+                       "python": sys.version.split()[0], "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,11 @@
-import pandas as pd
 from pathlib import Path
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from PIL import Image, ImageTk
 from tkinter import Tk, Canvas, Button, PhotoImage, Label
-import mplcursors as mpc
+import matplotlib.dates as mdates
+from vycarb.hover import NearestHover
+from vycarb.datalog_cache import LazyDatalog
 
 OUTPUT_PATH = Path(__file__).parent
 ASSETS_PATH = OUTPUT_PATH / "assets"
@@ -51,48 +52,32 @@ def stop_system():
     system_running = False
     print("System stopped.")
 
-# Load 
+# Load (columns come from datalog_cache.SCHEMA; each sheet is read in the background
+# the first time a panel asks for it, and served from .datalog_cache/ afterwards)
 excel_path = OUTPUT_PATH / "RPI_Sensor_datalogs.xlsx"
-all_sheets = pd.read_excel(excel_path, sheet_name=None)
-sheets = {}
-
-for name, df in all_sheets.items():
-    if "Unnamed: 1" in df.columns:
-        df.rename(columns={"Unnamed: 1":"timestamp"}, inplace=True)
-        if isinstance(df["timestamp"].iloc[0], str) and "timestamp" in df["timestamp"].iloc[0].lower():
-            df = df.drop(index=0).reset_index(drop=True)
-        df["datetime"] = pd.to_datetime(df["timestamp"], errors="coerce")
-    sheets[name] = df
-
-reactor = sheets["reactor_raw_data"].copy()
-reactor.rename(columns={"Unnamed: 3":"flow"}, inplace=True)
-
-doser = sheets["doser_raw_data"].copy()
-doser.rename(columns={"Unnamed: 3":"dosing_rate"}, inplace=True)
-
-def prep_di(raw, proc):
-    for d in (raw, proc):
-        d.drop(index=0, inplace=True, errors="ignore")
-        d.reset_index(drop=True, inplace=True)
-        # Updated to include Air temp, Water temp, and Pressure columns
-        d.rename(columns={"Unnamed: 4":"ph", "Unnamed: 7":"co2", "Unnamed: 9":"ec",
-                          "Unnamed: 6":"air_temp", "Unnamed: 5":"water_temp", "Unnamed: 8":"pressure"}, inplace=True)
-        d["datetime"] = pd.to_datetime(d["timestamp"], errors="coerce")
-    return raw, proc
-
-di1_raw, di1_proc = prep_di(sheets["di-sea_1_raw_data"], sheets["di-sea_1_processed_data"])
-di2_raw, di2_proc = prep_di(sheets["di-sea_2_raw_data"], sheets["di-sea_2_processed_data"])
-
-ve = sheets["ve_direct_raw_data"].copy()
-if isinstance(ve["timestamp"].iloc[0], str) and "timestamp" in ve["timestamp"].iloc[0].lower():
-    ve.drop(index=0, inplace=True)
-    ve.reset_index(drop=True, inplace=True)
-hdr = all_sheets["ve_direct_raw_data"].iloc[0].to_dict()
-yield_col = next((c for c,v in hdr.items() if "yield" in str(v).lower()), None)
-if yield_col:
-    ve.rename(columns={yield_col:"total_solar_yield"}, inplace=True)
-else:
-    ve["total_solar_yield"] = float("nan")
+datalog = LazyDatalog(excel_path)
+
+def when_ready(futures, draw, what):
+    """Call draw(*results) on the Tk thread once all the futures are done."""
+    def poll():
+        if not all(f.done() for f in futures):
+            window.after(50, poll)
+            return
+        try:
+            results = [f.result() for f in futures]
+        except Exception as e:
+            print(f"Could not load {what}: {e}")
+            return
+        draw(*results)
+
+    poll()
+
+def when_loaded(sheet_names, draw):
+    when_ready([datalog.request(name) for name in sheet_names], draw, ", ".join(sheet_names))
+
+def when_latest(sheet_name, show):
+    """Readouts only need the newest row, not the whole sheet."""
+    when_ready([datalog.latest(sheet_name)], show, sheet_name)
 
 # GUI 
 window = Tk()
@@ -153,9 +138,48 @@ canvas.create_rectangle(935, 184, 936, 392, fill="#FFFFFF", outline="")
 canvas.create_rectangle(1033, 184, 1034, 392, fill="#FFFFFF", outline="")
 
 # ——————————————————————————————
-# Embed Plots
+# Embed Plots (each panel appears as soon as its sheets are loaded)
 # ——————————————————————————————
 
+def fmt_hover(x, y):
+    return f"{mdates.num2date(x):%m-%d %H:%M}\n{y:.2f}"
+
+# Plots on the same row of a card share one Figure (GridSpec) and one Tk canvas:
+# one Agg buffer and one rasterization per row instead of one per plot
+def draw_di_plots(plots_config, raw, proc):
+    rows = {}
+    for config in plots_config:
+        rows.setdefault(config["y"], []).append(config)
+
+    for row in rows.values():
+        x0 = min(c["x"] for c in row)
+        x1 = max(c["x"] + c["width"] for c in row)
+        height = max(c["height"] for c in row)
+        fig = Figure(dpi=80, figsize=((x1 - x0) / 80, height / 80), facecolor="#2A2F4F")
+        grid = fig.add_gridspec(1, len(row), wspace=0.45)
+
+        for i, config in enumerate(row):
+            ax = fig.add_subplot(grid[0, i])
+            
+            # Plot raw and processed data
+            l1 = ax.plot(raw["datetime"], raw[config["name"]], color=config["raw_color"], label=f"Calibrated_{config['name'].upper()}")
+            l2 = ax.plot(proc["datetime"], proc[config["name"]], color=config["proc_color"], linestyle='--', label=config['name'].upper())
+            
+            ax.set_title(config["y_label"], color='white', fontsize=10)
+            ax.set_facecolor("#0D1117")
+            ax.tick_params(axis='x', colors='white', labelsize=6)
+            ax.tick_params(axis='y', colors='white', labelsize=6)
+            ax.spines['bottom'].set_color('white')
+            ax.spines['top'].set_color('white')
+            ax.spines['left'].set_color('white')
+            ax.spines['right'].set_color('white')
+            ax.set_xlabel("Time", color='white', fontsize=6)
+            ax.set_ylabel(config["name"].upper(), color='white', fontsize=6)
+            ax.legend(fontsize=6, loc='lower right', facecolor="#2A2F4F", edgecolor='white', labelcolor='white')
+            NearestHover(ax, l1 + l2, fmt=fmt_hover)
+        
+        embed_figure(fig, window, x0, row[0]["y"], x1 - x0, height)
+
 # DI-SEA 1 plots
 di1_plots_config = [
     {"name": "co2", "y_label": "Last CO2", "x": 10, "y": 185, "width": 180, "height": 130, "raw_color": "blue", "proc_color": "white"},
@@ -163,29 +187,8 @@ di1_plots_config = [
     {"name": "ph", "y_label": "Last pH", "x": 10, "y": 350, "width": 180, "height": 130, "raw_color": "yellow", "proc_color": "white"}
 ]
 
-for config in di1_plots_config:
-    fig = Figure(dpi=80, figsize=(2, 1.5), facecolor="#2A2F4F")
-    ax = fig.add_subplot(111)
-    
-    # Plot raw and processed data
-    l1 = ax.plot(di1_raw["datetime"], di1_raw[config["name"]], color=config["raw_color"], label=f"Calibrated_{config['name'].upper()}")
-    l2 = ax.plot(di1_proc["datetime"], di1_proc[config["name"]], color=config["proc_color"], linestyle='--', label=config['name'].upper())
-    
-    ax.set_title(config["y_label"], color='white', fontsize=10)
-    ax.set_facecolor("#0D1117")
-    ax.tick_params(axis='x', colors='white', labelsize=6)
-    ax.tick_params(axis='y', colors='white', labelsize=6)
-    ax.spines['bottom'].set_color('white')
-    ax.spines['top'].set_color('white')
-    ax.spines['left'].set_color('white')
-    ax.spines['right'].set_color('white')
-    ax.set_xlabel("Time", color='white', fontsize=6)
-    ax.set_ylabel(config["name"].upper(), color='white', fontsize=6)
-    ax.legend(fontsize=6, loc='lower right', facecolor="#2A2F4F", edgecolor='white', labelcolor='white')
-    
-    mpc.cursor(l1 + l2, hover=True)
-    
-    embed_figure(fig, window, config["x"], config["y"], config["width"], config["height"])
+when_loaded(["di-sea_1_raw_data", "di-sea_1_processed_data"],
+            lambda raw, proc: draw_di_plots(di1_plots_config, raw, proc))
 
 # DI-SEA 2 plots
 di2_plots_config = [
@@ -194,79 +197,61 @@ di2_plots_config = [
     {"name": "ph", "y_label": "Last pH", "x": 420, "y": 350, "width": 180, "height": 130, "raw_color": "yellow", "proc_color": "white"}
 ]
 
-for config in di2_plots_config:
-    fig = Figure(dpi=80, figsize=(2, 1.5), facecolor="#2A2F4F")
-    ax = fig.add_subplot(111)
-    
-    # Plot raw and processed data
-    l1 = ax.plot(di2_raw["datetime"], di2_raw[config["name"]], color=config["raw_color"], label=f"Calibrated_{config['name'].upper()}")
-    l2 = ax.plot(di2_proc["datetime"], di2_proc[config["name"]], color=config["proc_color"], linestyle='--', label=config['name'].upper())
-    
-    ax.set_title(config["y_label"], color='white', fontsize=10)
-    ax.set_facecolor("#0D1117")
-    ax.tick_params(axis='x', colors='white', labelsize=6)
-    ax.tick_params(axis='y', colors='white', labelsize=6)
-    ax.spines['bottom'].set_color('white')
-    ax.spines['top'].set_color('white')
-    ax.spines['left'].set_color('white')
-    ax.spines['right'].set_color('white')
-    ax.set_xlabel("Time", color='white', fontsize=6)
-    ax.set_ylabel(config["name"].upper(), color='white', fontsize=6)
-    ax.legend(fontsize=6, loc='lower right', facecolor="#2A2F4F", edgecolor='white', labelcolor='white')
-    
-    mpc.cursor(l1 + l2, hover=True)
-    
-    embed_figure(fig, window, config["x"], config["y"], config["width"], config["height"])
+when_loaded(["di-sea_2_raw_data", "di-sea_2_processed_data"],
+            lambda raw, proc: draw_di_plots(di2_plots_config, raw, proc))
 
 # Doser Rate plot
-fig_d = Figure(dpi=100); ax_d = fig_d.add_subplot(111)
-l = ax_d.plot(doser["datetime"], doser["dosing_rate"], color="#FFC300")
-ax_d.set_title("Doser Rate", color="#FFFFFF")
-ax_d.set_xlabel("Time")
-mpc.cursor(l, hover=True)
-embed_figure(fig_d, window, 8, 560, 300, 143)
+def draw_doser(doser):
+    fig_d = Figure(dpi=100); ax_d = fig_d.add_subplot(111)
+    l = ax_d.plot(doser["datetime"], doser["dosing_rate"], color="#FFC300")
+    ax_d.set_title("Doser Rate", color="#FFFFFF")
+    ax_d.set_xlabel("Time")
+    NearestHover(ax_d, l, fmt=fmt_hover)
+    embed_figure(fig_d, window, 8, 560, 300, 143)
+
+when_loaded(["doser_raw_data"], draw_doser)
 
 # Add "Air temp", "Water temp", and "Pressure" labels to DI-SEA 1 and DI-SEA 2
-try:
-    # DI-SEA 1
-    air_temp_di1 = float(di1_proc['air_temp'].iloc[-1])
-    water_temp_di1 = float(di1_proc['water_temp'].iloc[-1])
-    pressure_di1 = float(di1_proc['pressure'].iloc[-1])
-    canvas.create_text(220, 360, anchor="nw", text=f"Air temp: {air_temp_di1:.2f} C", fill="#FFFFFF", font=("Inter Bold", -15))
-    canvas.create_text(220, 390, anchor="nw", text=f"Water temp: {water_temp_di1:.2f} C", fill="#FFFFFF", font=("Inter Bold", -15))
-    canvas.create_text(220, 420, anchor="nw", text=f"Pressure: {pressure_di1:.2f} Pa", fill="#FFFFFF", font=("Inter Bold", -15))
-except (KeyError, IndexError):
-    canvas.create_text(220, 360, anchor="nw", text="Air temp: N/A", fill="#FFFFFF", font=("Inter Bold", -15))
-    canvas.create_text(220, 390, anchor="nw", text="Water temp: N/A", fill="#FFFFFF", font=("Inter Bold", -15))
-    canvas.create_text(220, 420, anchor="nw", text="Pressure: N/A", fill="#FFFFFF", font=("Inter Bold", -15))
-
-try:
-    # DI-SEA 2
-    air_temp_di2 = float(di2_proc['air_temp'].iloc[-1])
-    water_temp_di2 = float(di2_proc['water_temp'].iloc[-1])
-    pressure_di2 = float(di2_proc['pressure'].iloc[-1])
-    canvas.create_text(630, 360, anchor="nw", text=f"Air temp: {air_temp_di2:.2f} C", fill="#FFFFFF", font=("Inter Bold", -15))
-    canvas.create_text(630, 390, anchor="nw", text=f"Water temp: {water_temp_di2:.2f} C", fill="#FFFFFF", font=("Inter Bold", -15))
-    canvas.create_text(630, 420, anchor="nw", text=f"Pressure: {pressure_di2:.2f} Pa", fill="#FFFFFF", font=("Inter Bold", -15))
-except (KeyError, IndexError):
-    canvas.create_text(630, 360, anchor="nw", text="Air temp: N/A", fill="#FFFFFF", font=("Inter Bold", -15))
-    canvas.create_text(630, 390, anchor="nw", text="Water temp: N/A", fill="#FFFFFF", font=("Inter Bold", -15))
-    canvas.create_text(630, 420, anchor="nw", text="Pressure: N/A", fill="#FFFFFF", font=("Inter Bold", -15))
+def create_temp_texts(x):
+    return [canvas.create_text(x, y, anchor="nw", text=f"{label}: ...", fill="#FFFFFF", font=("Inter Bold", -15))
+            for y, label in [(360, "Air temp"), (390, "Water temp"), (420, "Pressure")]]
+
+def show_temps(text_ids, latest):
+    air_id, water_id, pressure_id = text_ids
+    try:
+        air_temp = float(latest['air_temp'])
+        water_temp = float(latest['water_temp'])
+        pressure = float(latest['pressure'])
+        canvas.itemconfig(air_id, text=f"Air temp: {air_temp:.2f} C")
+        canvas.itemconfig(water_id, text=f"Water temp: {water_temp:.2f} C")
+        canvas.itemconfig(pressure_id, text=f"Pressure: {pressure:.2f} Pa")
+    except KeyError:
+        canvas.itemconfig(air_id, text="Air temp: N/A")
+        canvas.itemconfig(water_id, text="Water temp: N/A")
+        canvas.itemconfig(pressure_id, text="Pressure: N/A")
+
+di1_temp_ids = create_temp_texts(220)   # DI-SEA 1
+di2_temp_ids = create_temp_texts(630)   # DI-SEA 2
+when_latest("di-sea_1_processed_data", lambda latest: show_temps(di1_temp_ids, latest))
+when_latest("di-sea_2_processed_data", lambda latest: show_temps(di2_temp_ids, latest))
 
 
 # Flow value 
-flow_value = float(reactor["flow"].iloc[-1])
-canvas.create_text(400, 590, anchor="nw",
-                   text=f"Flow: {flow_value:.2f} L/Min",
-                   fill="#FFFFFF", font=("Inter Bold", -20))
+flow_text_id = canvas.create_text(400, 590, anchor="nw",
+                                  text="Flow: ... L/Min",
+                                  fill="#FFFFFF", font=("Inter Bold", -20))
+when_latest("reactor_raw_data",
+            lambda latest: canvas.itemconfig(flow_text_id, text=f"Flow: {float(latest['flow']):.2f} L/Min"))
 
 # Solar Yield 
-total_yield = float(ve["total_solar_yield"].iloc[-1])
 canvas.create_text(330, 700, anchor="nw",
                    text="Yield:", fill="#FFFFFF", font=("Inter Bold", -18))
-canvas.create_text(330, 730, anchor="nw",
-                   text=f"{total_yield:.2f}", fill="#FFFFFF", font=("Inter Bold", -18))
+yield_text_id = canvas.create_text(330, 730, anchor="nw",
+                                   text="...", fill="#FFFFFF", font=("Inter Bold", -18))
+when_latest("ve_direct_raw_data",
+            lambda latest: canvas.itemconfig(yield_text_id, text=f"{float(latest['total_solar_yield']):.2f}"))
 
 window.title("Vycarb GUI")
 window.resizable(False, False)
 window.mainloop()
+datalog.close()
@@ -0,0 +1,168 @@
+"""Replay the Excel datalogs or a recorded session into the live GUI.
+
+Publishes on the endpoint newterminal.py subscribes to, so the live path can
+be exercised with real data offline:
+
+    python replay.py RPI_Sensor_datalogs.xlsx --speed 60    # one hour per minute
+    python replay.py recordings/ --max                      # as fast as ZMQ takes it
+
+Datalog rows are turned into the simulator's device schema (di-sea_1/di-sea_2
+nested dicts, doser dosing_rate, reactor flow, ve_direct yield_total) and sent
+as "data|{json}", or as multipart frames with --encoding (see vycarb/decoder.py). The
+workbook has no battery sheet, so battery messages only come from recordings.
+Recorder segments (see vycarb/recorder.py) are sent exactly as they were received.
+"""
+
+import argparse
+import json
+import math
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import zmq
+
+from vycarb import decoder
+from vycarb.datalog_cache import LazyDatalog
+from vycarb.recorder import read_segments
+
+ENDPOINT = "tcp://*:5555"
+WARMUP_S = 0.5          # PUB drops everything sent before subscribers have connected
+
+# datalog sheet -> (device, sub-dict or None, {clean column: live field})
+DI_SEA_FIELDS = {"water_temp": "temp", "air_temp": "air_temp", "pressure": "psi",
+                 "ph": "ph", "co2": "co2", "ec": "ec"}
+DATALOG_FEED = {
+    "di-sea_1_raw_data":  ("di-sea", "di-sea_1", DI_SEA_FIELDS),
+    "di-sea_2_raw_data":  ("di-sea", "di-sea_2", DI_SEA_FIELDS),
+    "doser_raw_data":     ("doser", None, {"dosing_rate": "dosing_rate"}),
+    "reactor_raw_data":   ("reactor", None, {"flow": "flow"}),
+    "ve_direct_raw_data": ("ve_direct", None, {"total_solar_yield": "yield_total"}),
+}
+
+
+def datalog_messages(excel_path, processed=False):
+    """Yield (epoch seconds, device, message) for the datalog rows, oldest first.
+
+    Rows of one device with the same timestamp become one message, so both
+    di-sea loggers logged at the same moment arrive together, like the
+    simulator's. A di-sea message carries only the loggers with a row at that
+    moment; a NaN cell repeats that logger's previous value.
+    """
+    feed = {name.replace("_raw_", "_processed_") if processed and name.startswith("di-sea") else name: spec
+            for name, spec in DATALOG_FEED.items()}
+    datalog = LazyDatalog(excel_path)
+    try:
+        futures = {name: datalog.request(name) for name in feed}
+        frames = {}
+        for name, future in futures.items():
+            try:
+                frames[name] = future.result()
+            except KeyError:
+                print(f"{name}: not in workbook, skipped")
+    finally:
+        datalog.close()
+
+    names, times, rows = [], [], []
+    for i, (name, df) in enumerate(frames.items()):
+        df = df.dropna(subset=["datetime"])
+        frames[name] = df
+        names.append(name)
+        times.append(df["datetime"].to_numpy("datetime64[us]"))     # naive wall-clock times
+        rows.append(np.full(len(df), i))
+    if not names:
+        return
+    times, which = np.concatenate(times), np.concatenate(rows)
+    index = np.concatenate([np.arange(len(frames[n])) for n in names])
+    order = np.argsort(times, kind="stable")
+
+    columns = {name: {col: frames[name][col].to_numpy() for col in feed[name][2]} for name in names}
+    di_sea = {"di-sea_1": {}, "di-sea_2": {}}
+    k = 0
+    while k < len(order):
+        stamp = times[order[k]]
+        updated = {}        # device -> its data, for the devices with rows at `stamp`
+        loggers = {}        # di-sea device -> the loggers with rows at `stamp`
+        while k < len(order) and times[order[k]] == stamp:
+            name = names[which[order[k]]]
+            device, sub, fields = feed[name]
+            state = di_sea[sub] if sub else updated.setdefault(device, {})
+            row = index[order[k]]
+            for col, field in fields.items():
+                value = float(columns[name][col][row])
+                if not math.isnan(value):
+                    state[field] = float(f"{value:.7g}")     # float32 in the cache: drop the noise digits
+            if sub:
+                updated[device] = None
+                loggers.setdefault(device, set()).add(sub)
+            k += 1
+        when = stamp.item()     # naive datetime, sent as logged (no time zone conversion)
+        for device, data in updated.items():
+            if data is None:
+                data = {s: dict(di_sea[s]) for s in sorted(loggers[device]) if di_sea[s]}
+            if data:
+                yield when.timestamp(), device, {"device_name": device, "msg_type": "data", "status": "ok",
+                                                 "timestamp": when.isoformat(), "data": data}
+
+
+def datalog_frames(excel_path, encoding=None, processed=False, now=False):
+    """(epoch seconds, frames) for the datalogs; encoding None means legacy "data|{json}"."""
+    for t, device, obj in datalog_messages(excel_path, processed):
+        if now:
+            obj["timestamp"] = datetime.now().isoformat()
+        if encoding is None:
+            yield t, [f"data|{json.dumps(obj)}".encode()]
+        else:
+            yield t, decoder.encode(f"data.{device}", obj, encoding)
+
+
+def replay(events, socket, speed=1.0):
+    """Send (t, frames) events, spaced by their timestamps / speed (speed <= 0: no waiting)."""
+    sent = 0
+    start, t0 = time.monotonic(), None
+    for t, frames in events:
+        if speed > 0:
+            if t0 is None:
+                t0 = t
+            delay = (t - t0) / speed - (time.monotonic() - start)
+            if delay > 0:
+                time.sleep(delay)
+        socket.send_multipart(frames)
+        sent += 1
+    return sent, time.monotonic() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", type=Path, help="datalog .xlsx, recorder segment, or directory of segments")
+    parser.add_argument("--endpoint", default=ENDPOINT, help=f"PUB bind address (default {ENDPOINT})")
+    parser.add_argument("--speed", type=float, default=1.0, help="time scale, 1 = real time (default)")
+    parser.add_argument("--max", action="store_true", help="send as fast as possible")
+    parser.add_argument("--encoding", choices=decoder.ENCODINGS,
+                        help="datalogs only: send multipart frames in this encoding instead of data|{json}")
+    parser.add_argument("--processed", action="store_true", help="datalogs only: use the processed di-sea sheets")
+    parser.add_argument("--now", action="store_true", help="datalogs only: stamp messages with the send time")
+    args = parser.parse_args(argv)
+
+    if args.source.suffix.lower() in (".xlsx", ".xlsm"):
+        events = datalog_frames(args.source, args.encoding, args.processed, args.now)
+    else:
+        events = read_segments(args.source)
+
+    socket = zmq.Context.instance().socket(zmq.PUB)
+    socket.setsockopt(zmq.SNDHWM, 0)      # unbounded queue: PUB would drop at --max otherwise
+    socket.bind(args.endpoint)
+    time.sleep(WARMUP_S)
+    try:
+        sent, elapsed = replay(events, socket, 0 if args.max else args.speed)
+    except KeyboardInterrupt:
+        print("Interrupted")
+        return
+    finally:
+        socket.close(linger=1000)
+    print(f"Sent {sent} messages in {elapsed:.1f} s ({sent / max(elapsed, 1e-9):.0f} msg/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# vycarb is imported from the checkout, as newterminal.py does; it is not installed
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
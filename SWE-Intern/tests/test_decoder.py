@@ -0,0 +1,107 @@
+import json
+import math
+
+import pytest
+
+from vycarb import decoder
+from vycarb.state import DiSeaReading, DoserReading
+
+DI_SEA = {
+    "device_name": "di-sea", "msg_type": "data", "status": "ok", "timestamp": 1751328000.0,
+    "data": {
+        "di-sea_1": {"temp": 21.5, "air_temp": 19.0, "psi": 14.5, "ph": 7.25, "co2": 410.0, "cycle": 3},
+        "di-sea_2": {"temp": 22.0, "air_temp": 19.5, "psi": 14.0, "ph": 6.75, "co2": 415.0, "cycle": 3},
+    },
+}
+DOSER = {"device_name": "doser", "msg_type": "data", "status": "ok", "timestamp": 1751328000.0,
+         "data": {"dosing_rate": 1.5}}
+
+
+@pytest.fixture(params=decoder.JSON_BACKENDS)
+def json_backend(request):
+    try:
+        decoder.set_json_backend(request.param)
+    except ImportError:
+        pytest.skip(f"{request.param} not installed")
+    yield request.param
+    decoder.set_json_backend()
+
+
+def test_legacy_round_trip(json_backend):
+    topic, obj = decoder.decode([f"data|{json.dumps(DI_SEA)}".encode()])
+    assert (topic, obj) == ("data", DI_SEA)
+
+
+def test_json_round_trip(json_backend):
+    assert decoder.decode(decoder.encode("data.doser", DOSER)) == ("data.doser", DOSER)
+
+
+def test_json_nan_accepted_by_every_backend(json_backend):
+    obj = dict(DOSER, data={"dosing_rate": math.nan})
+    _, decoded = decoder.decode(decoder.encode("data.doser", obj))
+    assert math.isnan(decoded["data"]["dosing_rate"])
+
+
+def test_msgpack_round_trip():
+    pytest.importorskip("msgpack")
+    assert decoder.decode(decoder.encode("data.doser", DOSER, "msgpack")) == ("data.doser", DOSER)
+
+
+def test_struct_round_trip():
+    frames = decoder.encode("data.di-sea", DI_SEA, "struct")
+    assert frames[0] == b"data.di-sea:struct"
+    topic, obj = decoder.decode(frames)
+    assert topic == "data.di-sea"
+    assert obj == DI_SEA     # every value above is exact in float32
+
+
+def test_struct_leaves_out_a_missing_logger():
+    obj = dict(DI_SEA, data={"di-sea_2": DI_SEA["data"]["di-sea_2"]})
+    _, decoded = decoder.decode(decoder.encode("data.di-sea", obj, "struct"))
+    assert list(decoded["data"]) == ["di-sea_2"]
+    reading = decoder.to_reading("data.di-sea", decoded)
+    assert not reading.d1.reported and math.isnan(reading.d1.ph)
+    assert reading.d2.reported and reading.d2.ph == 6.75
+
+
+def test_struct_missing_value_is_nan():
+    obj = dict(DOSER, data={})
+    _, decoded = decoder.decode(decoder.encode("data.doser", obj, "struct"))
+    assert math.isnan(decoded["data"]["dosing_rate"])
+
+
+def test_decode_reading_types():
+    _, reading = decoder.decode_reading(decoder.encode("data.di-sea", DI_SEA, "struct"))
+    assert isinstance(reading, DiSeaReading)
+    assert reading.timestamp == DI_SEA["timestamp"]
+    assert (reading.d1.ph, reading.d2.co2, reading.d1.cycle) == (7.25, 415.0, 3)
+    _, reading = decoder.decode_reading([f"data|{json.dumps(DOSER)}".encode()])
+    assert isinstance(reading, DoserReading) and reading.dosing_rate == 1.5
+
+
+def test_decode_reading_passes_logs_through():
+    log = {"device_name": "gui", "msg_type": "log", "status": "ok", "data": {}}
+    assert decoder.decode_reading(decoder.encode("logs", log)) == ("logs", log)
+
+
+@pytest.mark.parametrize("frames", [
+    [b"no separator"],
+    [b"data|{not json"],
+    [b"data|[1, 2]"],                           # not an object
+    [b"data.doser", b"{}", b"extra"],
+    [b"data.doser:yaml", b"{}"],
+    [b"data.\xff:json", b"{}"],
+    [b"data.doser:struct", b"\x00\x01"],        # truncated
+    [b"data.doser:struct", b"\xff" + bytes(40)],   # unknown device code
+    [b"data.doser", b"\xff\xfe"],               # not UTF-8
+], ids=["legacy-no-topic", "bad-json", "not-object", "three-frames", "unknown-encoding",
+        "bad-topic", "short-struct", "bad-device", "bad-utf8"])
+def test_bad_frames_raise_value_error(json_backend, frames):
+    with pytest.raises(ValueError):
+        decoder.decode_reading(frames)
+
+
+def test_bad_reading_payload_raises_value_error():
+    obj = dict(DOSER, data={"dosing_rate": "fast"})
+    with pytest.raises(ValueError, match="bad doser payload"):
+        decoder.decode_reading(decoder.encode("data.doser", obj))
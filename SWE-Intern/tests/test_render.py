@@ -0,0 +1,143 @@
+import numpy as np
+import pytest
+
+from vycarb.render import LiveLine, MinMaxDecimator, RingBuffer
+
+
+def test_ring_buffer_wraps_keeping_newest():
+    buf = RingBuffer(4)
+    for v in range(6):
+        buf.append(v)
+    assert len(buf) == 4
+    assert buf.view().tolist() == [2, 3, 4, 5]
+    buf.extend([6, 7, 8])
+    assert buf.view().tolist() == [5, 6, 7, 8]
+
+
+def test_ring_buffer_extend_longer_than_capacity():
+    buf = RingBuffer(3)
+    buf.append(-1)
+    buf.extend(range(10))
+    assert buf.view().tolist() == [7, 8, 9]
+    buf.append(10)
+    assert buf.view().tolist() == [8, 9, 10]
+
+
+def test_ring_buffer_view_is_contiguous_without_copy():
+    buf = RingBuffer(5)
+    buf.extend(range(8))
+    view = buf.view()
+    assert view.base is buf._data
+    assert view.tolist() == [3, 4, 5, 6, 7]
+
+
+def test_ring_buffer_drop_front():
+    buf = RingBuffer(4)
+    buf.extend([1, 2, 3, 4, 5])
+    buf.drop_front(2)
+    assert buf.view().tolist() == [4, 5]
+    buf.extend([6, 7])
+    assert buf.view().tolist() == [4, 5, 6, 7]
+    buf.drop_front(10)
+    assert len(buf) == 0 and buf.view().tolist() == []
+
+
+@pytest.mark.parametrize("capacity, expected", [(8, [2, 3, 4, 5, 6]), (3, [4, 5, 6])])
+def test_ring_buffer_resize_keeps_newest(capacity, expected):
+    buf = RingBuffer(5)
+    buf.extend(range(7))
+    buf.resize(capacity)
+    assert buf.capacity == capacity
+    assert buf.view().tolist() == expected
+    buf.append(7)
+    assert buf.view().tolist() == (expected + [7])[-capacity:]
+
+
+def test_decimator_trim_recomputes_the_first_bucket():
+    dec = MinMaxDecimator(10.0)
+    ts = np.arange(30.0)
+    ys = np.where(ts == 11, 100.0, ts % 10)
+    dec.add(ts.tolist(), ys.tolist())
+    assert [b[0] for b in dec.buckets] == [0, 1, 2]
+    dec.trim(ts[12:], ys[12:])
+    assert list(dec.buckets) == [[1, 2.0, 9.0], [2, 0.0, 9.0]]
+
+
+def live_line(**kwargs):
+    kwargs.setdefault("window_s", 600)
+    return LiveLine(None, w=300, h=100, **kwargs)    # headless: Agg canvas, renders on every extend
+
+
+def drawn_bounds(line):
+    ys = line.line.get_ydata()
+    return min(ys), max(ys)
+
+
+def test_live_line_evicts_by_time():
+    line = live_line(maxlen=1000, window_s=60)
+    ts = np.arange(0.0, 200.0)
+    line.extend(np.sin(ts), ts)
+    kept = line.buffer_t.view()
+    assert kept[0] >= 200 - 1 - 60 and kept[-1] == 199
+    assert len(line.buffer_y) == len(kept)
+
+
+def test_live_line_envelope_follows_capacity_eviction():
+    # a spike pushed out of the ring buffer (not the time window) must leave the
+    # envelope, the running y-range and the y-limits as well
+    line = live_line(maxlen=1000, window_s=600)
+    ts = np.arange(6000) * 0.01           # dense enough that the envelope is drawn
+    ys = np.concatenate([np.full(5000, 100.0), (np.arange(1000) % 7) / 7])
+    for chunk in range(0, len(ts), 500):
+        line.extend(ys[chunk:chunk + 500], ts[chunk:chunk + 500])
+    kept = line.buffer_y.view()
+    assert len(kept) == 1000 and kept.max() < 1.0
+    assert len(line.line.get_xdata()) < len(kept)
+    assert line.y_range.bounds() == (kept.min(), kept.max())
+    lo, hi = drawn_bounds(line)
+    assert kept.min() <= lo and hi <= kept.max()
+    assert line.ax.get_ylim()[1] < 2.0
+
+
+def test_live_line_envelope_drawn_when_dense():
+    line = live_line(maxlen=100_000, window_s=600)
+    ts = np.linspace(0.0, 600.0, 50_000)
+    ys = np.sin(ts)
+    line.extend(ys, ts)
+    assert len(line.line.get_xdata()) <= 2 * len(line.decimator) < len(ts)
+    lo, hi = drawn_bounds(line)
+    assert lo == pytest.approx(ys.min()) and hi == pytest.approx(ys.max())
+
+
+def test_live_line_drops_slightly_late_samples():
+    line = live_line(maxlen=100)
+    line.extend([1.0, 2.0, 3.0], [100.0, 101.0, 102.0])
+    line.extend([50.0, 4.0], [90.0, 103.0])      # 12 s late: dropped, not a restart
+    assert line.buffer_t.view().tolist() == [100.0, 101.0, 102.0, 103.0]
+    assert line.y_range.bounds() == (1.0, 4.0)
+
+
+def test_live_line_restarts_on_a_large_backward_jump():
+    line = live_line(maxlen=100)
+    line.extend([1.0, 2.0], [10_000.0, 10_001.0])
+    line.extend([7.0, 8.0], [10.0, 11.0])        # e.g. a replay started over
+    assert line.buffer_t.view().tolist() == [10.0, 11.0]
+    assert line.buffer_y.view().tolist() == [7.0, 8.0]
+    assert line.y_range.bounds() == (7.0, 8.0)
+    assert [b[1:] for b in line.decimator.buckets] == [[7.0, 8.0]]
+
+
+def test_live_line_skips_nan():
+    line = live_line(maxlen=100)
+    line.extend([1.0, float("nan"), 3.0], [1.0, 2.0, 3.0])
+    assert line.buffer_t.view().tolist() == [1.0, 3.0]
+    assert line.y_range.bounds() == (1.0, 3.0)
+
+
+def test_live_line_set_maxlen_keeps_range_consistent():
+    line = live_line(maxlen=100)
+    ts = np.arange(100.0)
+    line.extend(ts * 2, ts)
+    line.set_maxlen(10)
+    assert line.buffer_t.view().tolist() == ts[-10:].tolist()
+    assert line.y_range.bounds() == (180.0, 198.0)
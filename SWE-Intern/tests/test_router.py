@@ -0,0 +1,91 @@
+import collections
+import json
+import time
+
+import pytest
+
+from vycarb import decoder
+from vycarb.router import Router
+
+
+class FakeReceiver:
+    """What Router reads from a Receiver: the inbox, conflated frames and stats."""
+
+    def __init__(self):
+        self.inbox = collections.deque()
+        self.latest = {}
+        self.stats = {"received": 0, "coalesced": 0, "dropped": 0}
+
+    def put(self, frames):
+        self.stats["received"] += 1
+        try:
+            record = (time.perf_counter(), *decoder.decode_reading(frames))
+        except ValueError as e:
+            self.stats["dropped"] += 1
+            record = (time.perf_counter(), None, str(e))
+        self.inbox.append(record)
+
+
+class FakeLine:
+    def __init__(self):
+        self.ts, self.ys = [], []
+
+    def extend(self, ys, ts):
+        self.ys.extend(ys)
+        self.ts.extend(ts)
+
+
+def doser(t, rate):
+    obj = {"device_name": "doser", "msg_type": "data", "status": "ok", "timestamp": t,
+           "data": {"dosing_rate": rate}}
+    return [f"data|{json.dumps(obj)}".encode()]
+
+
+@pytest.fixture
+def routed():
+    receiver, line, printed, updated = FakeReceiver(), FakeLine(), [], []
+    router = Router(receiver, {"doser": [(line, "dosing_rate")]},
+                    on_update=updated.append, on_line=lambda *args: printed.append(args))
+    return router, receiver, line, printed, updated
+
+
+def test_step_routes_every_sample_and_the_newest_reading(routed):
+    router, receiver, line, printed, updated = routed
+    for i in range(5):
+        receiver.put(doser(100.0 + i, float(i)))
+    assert len(router.step()) == 5
+    assert line.ts == [100.0, 101.0, 102.0, 103.0, 104.0]
+    assert line.ys == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert router.store.latest["doser"].dosing_rate == 4.0
+    assert updated == ["doser"]
+    assert len(printed) == 5
+    assert router.stats["coalesced"] == 4
+
+
+def test_drain_keeps_good_records_around_bad_ones(routed):
+    router, receiver, line, printed, updated = routed
+    receiver.put(doser(100.0, 1.0))
+    receiver.put([b"data|{not json"])                   # dropped by the receiver
+    receiver.put(doser(101.0, 2.0))
+    receiver.inbox.append((time.perf_counter(), "data.doser", object()))  # fails in _route
+    receiver.put(doser(102.0, 3.0))
+    recv_times = router.step()
+    assert len(recv_times) == 5
+    assert line.ys == [1.0, 2.0, 3.0]
+    assert router.store.latest["doser"].dosing_rate == 3.0
+    errors = [args for args in printed if args[1] == "err"]
+    assert [args[3] for args in errors] == ["feed", "route"]
+    assert "AttributeError" in errors[1][5]
+    assert router.totals()["dropped"] == 2
+
+
+def test_conflated_topics_are_decoded_once(routed):
+    router, receiver, line, printed, updated = routed
+    receiver.latest["data.doser"] = (time.perf_counter(), decoder.encode("data.doser", {
+        "device_name": "doser", "msg_type": "data", "status": "ok", "timestamp": 5.0,
+        "data": {"dosing_rate": 9.0}}))
+    receiver.latest["data.reactor"] = (time.perf_counter(), [b"data.reactor", b"]["])
+    router.step()
+    assert receiver.latest == {}
+    assert line.ys == [9.0]
+    assert router.stats["dropped"] == 1
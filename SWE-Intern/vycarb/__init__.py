@@ -0,0 +1,25 @@
+"""Importable core of the Vycarb GUIs.
+
+The live path, in the order a message travels through it:
+
+    feed       Receiver: ZMQ SUB thread, recording, conflation, inbox
+    decoder    wire framings and encodings -> message dicts / typed Readings
+    router     Router: inbox -> LiveLines (every sample) + StateStore (newest)
+    state      Reading types, StateStore: newest Reading per device, peripherals online
+    render     LiveLine/SharedFigure/RenderScheduler, ItemCache, TerminalPane
+
+plus recorder (segment log of the raw feed), hover (tooltips) and
+datalog_cache (the Excel datalogs as cached, normalized frames). None of
+these create a Tk window; newterminal.py, main_gui.py and OG_guiV1.py do.
+"""
+
+from .decoder import decode, decode_reading, encode, set_json_backend
+from .feed import Receiver
+from .recorder import Recorder, read_segments
+from .render import ItemCache, LiveLine, RenderScheduler, SharedFigure, TerminalPane
+from .router import Router
+from .state import READINGS, Reading, StateStore
+
+__all__ = ["decode", "decode_reading", "encode", "set_json_backend", "Receiver", "Recorder",
+           "read_segments", "ItemCache", "LiveLine", "RenderScheduler", "SharedFigure", "TerminalPane",
+           "Router", "READINGS", "Reading", "StateStore"]
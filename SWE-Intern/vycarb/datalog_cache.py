@@ -0,0 +1,253 @@
+"""Columnar cache for RPI_Sensor_datalogs.xlsx.
+
+Parsing every sheet of the workbook through openpyxl takes tens of seconds on
+the big datalogs. Each sheet is parsed once, cleaned with SCHEMA and stored as
+a Parquet file; later starts read the Parquet files straight back. Sheets are
+loaded lazily (LazyDatalog), so only the sheets a panel asks for are touched.
+
+The cache is keyed by the workbook's mtime + size, with a content hash as the
+tie-breaker (so a copied or touched but unchanged workbook still hits).
+"""
+
+import hashlib
+import json
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+CACHE_DIR = Path(__file__).parent.parent / ".datalog_cache"
+
+# How each sheet of the workbook becomes a clean frame.
+#   columns: logger column -> clean name (values are stored as VALUE_DTYPE)
+#   find:    clean name -> word to look for in the embedded header row, for
+#            columns whose position differs between loggers
+# Every clean frame also gets a parsed "datetime" column.
+DI_SEA_COLUMNS = {"Unnamed: 4": "ph", "Unnamed: 5": "water_temp", "Unnamed: 6": "air_temp",
+                  "Unnamed: 7": "co2", "Unnamed: 8": "pressure", "Unnamed: 9": "ec"}
+SCHEMA = {
+    "reactor_raw_data":        {"columns": {"Unnamed: 3": "flow"}},
+    "doser_raw_data":          {"columns": {"Unnamed: 3": "dosing_rate"}},
+    "di-sea_1_raw_data":       {"columns": DI_SEA_COLUMNS},
+    "di-sea_1_processed_data": {"columns": DI_SEA_COLUMNS},
+    "di-sea_2_raw_data":       {"columns": DI_SEA_COLUMNS},
+    "di-sea_2_processed_data": {"columns": DI_SEA_COLUMNS},
+    "ve_direct_raw_data":      {"find": {"total_solar_yield": "yield"}},
+}
+SCHEMA_VERSION = 1              # bump when SCHEMA changes so old caches are rebuilt
+TIMESTAMP_COLUMNS = ("Unnamed: 1", "timestamp")
+TIMESTAMP_FORMAT = "ISO8601"
+VALUE_DTYPE = "float32"
+PARQUET_ROW_GROUP = 10_000      # small row groups let tail reads skip most of a cached sheet
+
+
+def normalize_sheet(df: pd.DataFrame, spec: dict) -> pd.DataFrame:
+    """Apply one SCHEMA entry: rename, type and time-parse a sheet in one pass."""
+    columns = dict(spec.get("columns", {}))
+    header = df.iloc[0] if len(df) else pd.Series(dtype=object)
+    for name, word in spec.get("find", {}).items():
+        col = next((c for c, v in header.items() if word in str(v).lower()), None)
+        if col is not None:
+            columns[col] = name
+
+    ts_col = next((c for c in TIMESTAMP_COLUMNS if c in df.columns), None)
+    raw_ts = df[ts_col] if ts_col else pd.Series(pd.NaT, index=df.index)
+    when = pd.to_datetime(raw_ts, format=TIMESTAMP_FORMAT, errors="coerce")
+    if when.isna().all() and raw_ts.notna().any():
+        when = pd.to_datetime(raw_ts, errors="coerce")   # not ISO: let pandas infer
+    # the embedded header rows (names, units) are whatever sits before the first timestamp
+    first = when.first_valid_index()
+    start = 0 if first is None else df.index.get_loc(first)
+
+    out = pd.DataFrame({"datetime": when.iloc[start:].to_numpy()})
+    for src, name in columns.items():
+        if src in df.columns:
+            values = pd.to_numeric(df[src].iloc[start:], errors="coerce").to_numpy(dtype=VALUE_DTYPE)
+        else:
+            values = np.full(len(out), np.nan, dtype=VALUE_DTYPE)
+        out[name] = values
+    for name in spec.get("find", {}):
+        if name not in out:
+            out[name] = np.full(len(out), np.nan, dtype=VALUE_DTYPE)
+    return out
+
+
+def file_digest(path: Path) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _to_columnar(df: pd.DataFrame) -> pd.DataFrame:
+    """Make a sheet storable as Parquet: one type per column."""
+    df = df.infer_objects()
+    df.columns = [str(c) for c in df.columns]
+    for col in df.columns[df.dtypes == object]:
+        try:
+            df[col] = pd.to_numeric(df[col])
+        except (ValueError, TypeError):
+            df[col] = df[col].astype(str)
+    return df
+
+
+def _parquet_tail(path: Path, n: int) -> pd.DataFrame:
+    """Last n rows of a Parquet file, reading only the row groups that hold them."""
+    import pyarrow.parquet as pq
+
+    pf = pq.ParquetFile(path)
+    groups, rows = [], 0
+    for i in reversed(range(pf.num_row_groups)):
+        groups.insert(0, i)
+        rows += pf.metadata.row_group(i).num_rows
+        if rows >= n:
+            break
+    return pf.read_row_groups(groups).to_pandas().tail(n).reset_index(drop=True)
+
+
+def _read_manifest(cache_dir: Path):
+    try:
+        return json.loads((cache_dir / "manifest.json").read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def _write_manifest(cache_dir: Path, manifest: dict):
+    tmp = cache_dir / "manifest.json.tmp"
+    tmp.write_text(json.dumps(manifest))
+    tmp.replace(cache_dir / "manifest.json")
+
+
+class LazyDatalog:
+    """The datalog workbook, one sheet at a time, loaded on first use.
+
+    request(name) returns a Future; the sheet is read on a single background
+    thread (from the cache, or by streaming just that sheet out of the
+    workbook in openpyxl read-only mode) so the GUI can show its window
+    straight away and fill panels in as their sheets arrive.
+    """
+
+    def __init__(self, excel_path, schema=SCHEMA, version=SCHEMA_VERSION, cache_dir=None):
+        self.excel_path = Path(excel_path)
+        self.schema = schema
+        self.version = version
+        self.cache_dir = cache_dir or CACHE_DIR / "datalogs"
+        # one worker: the read-only workbook and the manifest are not thread-safe
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="datalog")
+        self._futures = {}
+        self._manifest = None
+        self._book = None
+
+    def request(self, name) -> Future:
+        future = self._futures.get(name)
+        if future is None:
+            future = self._futures[name] = self._pool.submit(self._load, name)
+        return future
+
+    def get(self, name) -> pd.DataFrame:
+        return self.request(name).result()
+
+    def tail(self, name, n=1) -> Future:
+        """Future of the last n cleaned rows; a cached sheet is read only from its last row groups."""
+        return self._pool.submit(self._tail, name, n)
+
+    def latest(self, name) -> Future:
+        """Future of the newest row as {column: value} ({} for an empty sheet)."""
+        return self._pool.submit(self._latest, name)
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        if self._book is not None:
+            self._book.close()
+
+    # everything below runs on the worker thread
+
+    def _load(self, name):
+        manifest = self._current_manifest()
+        fname = manifest["sheets"].get(name)
+        if fname:
+            try:
+                return pd.read_parquet(self.cache_dir / fname)
+            except (OSError, ImportError, ValueError):
+                pass  # damaged entry or no pyarrow: rebuild it
+        df = _to_columnar(normalize_sheet(self._read_sheet(name), self.schema[name]))
+        try:
+            fname = name + ".parquet"
+            df.to_parquet(self.cache_dir / fname, index=False, row_group_size=PARQUET_ROW_GROUP)
+            manifest["sheets"][name] = fname
+            _write_manifest(self.cache_dir, manifest)
+        except (OSError, ImportError) as e:
+            print(f"Datalog cache not written for {name}: {e}")
+        return df
+
+    def _tail(self, name, n):
+        full = self._futures.get(name)
+        if full is not None and full.done() and full.exception() is None:
+            return full.result().tail(n).reset_index(drop=True)
+        fname = self._current_manifest()["sheets"].get(name)
+        if fname:
+            try:
+                return _parquet_tail(self.cache_dir / fname, n)
+            except (OSError, ImportError, ValueError):
+                pass
+        # not cached yet: build (and cache) the whole sheet once, so the next start is fast
+        return self._load(name).tail(n).reset_index(drop=True)
+
+    def _latest(self, name):
+        rows = self._tail(name, 1).to_dict("records")
+        return rows[-1] if rows else {}
+
+    def _current_manifest(self):
+        if self._manifest is not None:
+            return self._manifest
+        st = self.excel_path.stat()
+        manifest = _read_manifest(self.cache_dir)
+        if manifest is not None and manifest.get("version") == self.version:
+            fresh = manifest["mtime_ns"] == st.st_mtime_ns and manifest["size"] == st.st_size
+            if not fresh and manifest["sha1"] == file_digest(self.excel_path):
+                manifest.update(mtime_ns=st.st_mtime_ns, size=st.st_size)
+                fresh = True
+            if not fresh:
+                manifest = None
+        else:
+            manifest = None
+        if manifest is None:
+            manifest = {"mtime_ns": st.st_mtime_ns, "size": st.st_size,
+                        "sha1": file_digest(self.excel_path), "version": self.version, "sheets": {}}
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            _write_manifest(self.cache_dir, manifest)
+        except OSError as e:
+            print(f"Datalog cache not written: {e}")
+        self._manifest = manifest
+        return manifest
+
+    def _read_sheet(self, name) -> pd.DataFrame:
+        """Same frame pd.read_excel(sheet_name=name) gives, streamed from a read-only workbook."""
+        if self._book is None:
+            self._book = openpyxl.load_workbook(self.excel_path, read_only=True, data_only=True)
+        rows = self._book[name].iter_rows(values_only=True)
+        header = next(rows, ())
+        columns = [f"Unnamed: {i}" if h is None else str(h) for i, h in enumerate(header)]
+        width = len(columns)
+        body = [tuple(row[:width]) + (None,) * (width - len(row))
+                for row in rows if any(v is not None for v in row)]
+        return pd.DataFrame(body, columns=columns)
+
+
+def load_workbook(excel_path):
+    """Return {sheet name: cleaned DataFrame} for every SCHEMA sheet in the workbook."""
+    datalog = LazyDatalog(excel_path)
+    try:
+        frames = {}
+        for name in datalog.schema:
+            try:
+                frames[name] = datalog.get(name)
+            except KeyError:
+                pass  # sheet not in this workbook
+        return frames
+    finally:
+        datalog.close()
@@ -0,0 +1,242 @@
+"""Message framing for the simulator -> GUI feed.
+
+Two framings are accepted on the SUB socket:
+
+    legacy     one frame   "topic|{json}"
+    multipart  two frames  [b"topic:encoding", payload]
+
+In the multipart form the encoding travels in the topic frame, so ZMQ can
+filter on the topic prefix without the body ever being decoded, and the body
+needs no "|" split. Topics are "data.<device>" (e.g. b"data.doser:struct")
+and "logs", so subscribers can pick single devices. Encodings:
+
+    json     UTF-8 JSON object (the default when the topic has no ":"), parsed
+             with the fastest installed backend, see JSON_BACKENDS. orjson and
+             simdjson reject the NaN/Infinity that json.dumps writes for
+             missing values; those payloads are parsed again with the stdlib,
+             so every backend accepts the same messages
+    msgpack  the same object as MessagePack (needs the msgpack package)
+    struct   fixed little-endian layout per device, see STRUCT_FIELDS; missing
+             values travel as NaN, and a di-sea logger whose values are all
+             NaN is left out of the decoded message, as in the JSON form
+
+Every decoder returns the same dict the JSON feed carries:
+{"device_name", "msg_type", "status", "timestamp", "data"}. The struct form
+only carries the fields the GUI shows and an epoch-seconds timestamp.
+decode_reading() goes one step further and turns data messages of known
+devices into typed Readings (see state.py), copying out only the fields
+the GUI uses.
+"""
+
+import json
+import math
+import struct
+import time
+from datetime import date, datetime
+
+from .state import READINGS
+
+ENCODINGS = ("json", "msgpack", "struct")
+
+# JSON parsers, fastest first; set_json_backend() picks the first one installed
+JSON_BACKENDS = ("orjson", "simdjson", "json")
+JSON_BACKEND = "json"
+json_loads = json.loads
+
+# device -> [(sub-dict or None, field, struct code)], in wire order
+DI_SEA_FIELDS = (("temp", "f"), ("air_temp", "f"), ("psi", "f"), ("ph", "f"), ("co2", "f"), ("cycle", "I"))
+STRUCT_FIELDS = {
+    "di-sea":    [(sub, name, code) for sub in ("di-sea_1", "di-sea_2") for name, code in DI_SEA_FIELDS],
+    "doser":     [(None, "dosing_rate", "f")],
+    "reactor":   [(None, "flow", "f")],
+    "battery":   [(None, "soc", "f")],
+    "ve_direct": [(None, "yield_total", "f")],
+}
+DEVICES = tuple(STRUCT_FIELDS)
+
+# device code, epoch timestamp, msg_type, status
+STRUCT_HEADER = struct.Struct("<Bd10s8s")
+STRUCT_BODIES = {device: struct.Struct("<" + "".join(code for _, _, code in fields))
+                 for device, fields in STRUCT_FIELDS.items()}
+
+
+def _msgpack():
+    import msgpack      # optional: only needed when a publisher actually sends msgpack
+    return msgpack
+
+
+def set_json_backend(name=None):
+    """Parse JSON payloads with `name` (one of JSON_BACKENDS), or the fastest installed if None.
+
+    Raises ImportError if the named backend is not installed. Returns the backend used.
+    """
+    global JSON_BACKEND, json_loads
+    for backend in (name,) if name else JSON_BACKENDS:
+        if backend == "orjson":
+            try:
+                import orjson       # optional
+            except ImportError:
+                if name:
+                    raise
+                continue
+            loads = orjson.loads
+        elif backend == "simdjson":
+            try:
+                import simdjson     # optional (pip install pysimdjson)
+            except ImportError:
+                if name:
+                    raise
+                continue
+            loads = simdjson.loads
+        elif backend == "json":
+            loads = json.loads
+        else:
+            raise ValueError(f"unknown JSON backend {backend!r}")
+        JSON_BACKEND, json_loads = backend, loads
+        return backend
+
+
+set_json_backend()
+
+
+def loads(payload):
+    """json_loads(), falling back to the stdlib parser for what the fast ones reject (NaN, Infinity)."""
+    try:
+        return json_loads(payload)
+    except ValueError:
+        if json_loads is json.loads:
+            raise
+        return json.loads(payload)
+
+
+def split_topic(frame: bytes):
+    """b"topic:encoding" -> ("topic", "encoding")."""
+    topic, _, encoding = frame.decode("ascii").partition(":")
+    return topic, encoding or "json"
+
+
+def topic_frame(topic, encoding="json") -> bytes:
+    return (topic if encoding == "json" else f"{topic}:{encoding}").encode("ascii")
+
+
+def pack_struct(obj) -> bytes:
+    device = obj.get("device_name", "")
+    fields = STRUCT_FIELDS[device]
+    data = obj.get("data") or {}
+    values = []
+    for sub, name, code in fields:
+        value = ((data.get(sub) or {}) if sub else data).get(name)
+        if code == "I":
+            values.append(1 if value is None else int(value))       # cycle numbers start at 1
+        else:
+            values.append(math.nan if value is None else float(value))
+    head = STRUCT_HEADER.pack(DEVICES.index(device), to_epoch(obj.get("timestamp")),
+                              obj.get("msg_type", "").encode("ascii"), obj.get("status", "").encode("ascii"))
+    return head + STRUCT_BODIES[device].pack(*values)
+
+
+def unpack_struct(payload: bytes) -> dict:
+    code, ts, msg_type, status = STRUCT_HEADER.unpack_from(payload)
+    try:
+        device = DEVICES[code]
+    except IndexError:
+        raise ValueError(f"unknown device code {code}") from None
+    values = STRUCT_BODIES[device].unpack_from(payload, STRUCT_HEADER.size)
+    data, reported = {}, set()
+    for (sub, name, code), value in zip(STRUCT_FIELDS[device], values):
+        (data.setdefault(sub, {}) if sub else data)[name] = value
+        if sub and code == "f" and not math.isnan(value):
+            reported.add(sub)
+    for sub in [key for key in data if isinstance(data[key], dict) and key not in reported]:
+        del data[sub]       # a logger that was not in the packed message
+    return {"device_name": device, "msg_type": msg_type.rstrip(b"\0").decode("ascii"),
+            "status": status.rstrip(b"\0").decode("ascii"), "timestamp": ts or None, "data": data}
+
+
+def encode(topic, obj, encoding="json"):
+    """Frames to send_multipart() for one message."""
+    if encoding == "json":
+        payload = json.dumps(obj).encode()
+    elif encoding == "msgpack":
+        payload = _msgpack().packb(obj)
+    elif encoding == "struct":
+        payload = pack_struct(obj)
+    else:
+        raise ValueError(f"unknown encoding {encoding!r}")
+    return [topic_frame(topic, encoding), payload]
+
+
+def to_epoch(ts):
+    """Payload timestamp (epoch, ISO string or HH:MM:SS) -> epoch seconds, now if unknown."""
+    if isinstance(ts, (int, float)):
+        return float(ts)
+    if isinstance(ts, str):
+        try:
+            return datetime.fromisoformat(ts).timestamp()     # what the simulator sends
+        except ValueError:
+            pass
+        for parse in (float,
+                      lambda v: datetime.combine(date.today(), datetime.strptime(v, "%H:%M:%S").time()).timestamp()):
+            try:
+                return parse(ts)
+            except ValueError:
+                pass
+    return time.time()
+
+
+def to_reading(topic, obj):
+    """A typed Reading for a data message from a known device; anything else is returned as is."""
+    if topic.partition(".")[0] != "data":
+        return obj
+    cls = READINGS.get(obj.get("device_name"))
+    if cls is None:
+        return obj
+    try:
+        return cls.from_data(obj.get("data") or {}, to_epoch(obj.get("timestamp")),
+                             obj.get("status", ""), obj.get("msg_type", ""))
+    except (TypeError, ValueError, AttributeError) as e:
+        raise ValueError(f"bad {cls.device} payload: {e}") from None
+
+
+def decode_reading(frames):
+    """decode(), then to_reading(): (topic, Reading or dict). Raises ValueError on a bad message."""
+    topic, obj = decode(frames)
+    return topic, to_reading(topic, obj)
+
+
+def decode(frames):
+    """recv_multipart() frames -> (topic, dict). Raises ValueError on a bad message."""
+    topic, obj = _decode(frames)
+    if not isinstance(obj, dict):
+        raise ValueError(f"{topic}: expected an object, got {type(obj).__name__}")
+    return topic, obj
+
+
+def _decode(frames):
+    if len(frames) == 1:
+        topic, sep, payload = frames[0].partition(b"|")
+        if not sep:
+            raise ValueError("legacy frame without a topic|")
+        return topic.decode(), loads(payload)
+    if len(frames) != 2:
+        raise ValueError(f"expected 1 or 2 frames, got {len(frames)}")
+    try:
+        topic, encoding = split_topic(frames[0])
+    except UnicodeDecodeError as e:
+        raise ValueError(f"bad topic frame: {e}") from None
+    payload = frames[1]
+    if encoding == "json":
+        return topic, loads(payload)
+    if encoding == "msgpack":
+        try:
+            return topic, _msgpack().unpackb(payload)
+        except ImportError:
+            raise ValueError("msgpack payload received but msgpack is not installed") from None
+        except Exception as e:      # msgpack raises several unrelated types on bad input
+            raise ValueError(f"bad msgpack payload: {e}") from None
+    if encoding == "struct":
+        try:
+            return topic, unpack_struct(payload)
+        except struct.error as e:
+            raise ValueError(f"bad struct payload: {e}") from None
+    raise ValueError(f"unknown encoding {encoding!r}")
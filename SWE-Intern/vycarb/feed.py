@@ -0,0 +1,160 @@
+"""ZMQ subscriber thread for the live GUI.
+
+Receiver owns the SUB socket(s), records and decodes every message (see
+decoder.py) and queues the results for the Tk loop, which drains them with
+router.Router. Nothing in here touches Tk.
+"""
+
+import collections
+import threading
+import time
+
+import zmq
+
+from . import decoder
+
+INBOX_SIZE = 50_000   # ring buffer between receiver thread and Tk
+
+
+class Receiver(threading.Thread):
+    """Owns the SUB socket, decodes messages (see decoder.py), hands records to Tk.
+
+    The inbox is a bounded deque: append/popleft are atomic, so the receiver
+    and the Tk loop never take a lock. When Tk falls behind the oldest
+    records are overwritten and counted as dropped.
+    Records are (recv_time, topic, Reading) for data from known devices,
+    (recv_time, topic, dict) for anything else, or (recv_time, None, error_text).
+    subscribe()/unsubscribe() may be called from Tk; sockets are only
+    touched on this thread, so changes are queued and applied between polls.
+
+    Topics in `conflate` are latest-value-wins: their raw frames go into
+    `latest` (topic -> (recv_time, frames)), overwriting the previous one, and
+    are decoded by Tk at most once per frame. With `conflate_sockets` each of
+    them gets its own SUB socket with ZMQ_CONFLATE, so libzmq already drops
+    the stale ones; ZMQ_CONFLATE keeps only one frame, so those publishers
+    must send single-frame "data.<device>|{json}" messages.
+
+    `stats` counts what this thread received, coalesced and dropped; the
+    router keeps its own counts for the Tk side (see Router.totals()).
+
+    A `recorder` (recorder.Recorder) gets every message before anything is
+    dropped or conflated; it is written to and closed on this thread only.
+    If it fails (e.g. the disk is full) recording stops, the error is queued
+    as an error record for the terminal, and receiving carries on.
+    """
+
+    def __init__(self, endpoint, topics=("",), conflate=(), conflate_sockets=False, recorder=None,
+                 maxlen=INBOX_SIZE):
+        super().__init__(name="zmq-receiver", daemon=True)
+        self.endpoint = endpoint
+        self.stats = {"received": 0, "coalesced": 0, "dropped": 0}     # written by this thread only
+        self.inbox = collections.deque(maxlen=maxlen)
+        self.latest = {}
+        self.topics = set(topics)
+        self.conflate = set(conflate)
+        self.conflate_sockets = conflate_sockets
+        self.recorder = recorder
+        self._changes = collections.deque()     # (zmq.SUBSCRIBE | zmq.UNSUBSCRIBE, topic)
+        self._halt = threading.Event()
+
+    def subscribe(self, topic):
+        if topic not in self.topics:
+            self.topics.add(topic)
+            self._changes.append((zmq.SUBSCRIBE, topic))
+
+    def unsubscribe(self, topic):
+        if topic in self.topics:
+            self.topics.discard(topic)
+            self._changes.append((zmq.UNSUBSCRIBE, topic))
+
+    def run(self):
+        context = zmq.Context.instance()
+        main = context.socket(zmq.SUB)
+        main.connect(self.endpoint)
+        poller = zmq.Poller()
+        poller.register(main, zmq.POLLIN)
+        dedicated = {}      # conflated topic -> its ZMQ_CONFLATE socket
+        owner = {}          # socket -> topic it conflates (None for the main socket)
+
+        def apply(option, topic):
+            if not (self.conflate_sockets and topic in self.conflate):
+                main.setsockopt_string(option, topic)
+            elif option == zmq.SUBSCRIBE:
+                sock = dedicated[topic] = context.socket(zmq.SUB)
+                sock.setsockopt(zmq.CONFLATE, 1)      # before connect
+                sock.connect(self.endpoint)
+                sock.setsockopt_string(zmq.SUBSCRIBE, topic)
+                poller.register(sock, zmq.POLLIN)
+                owner[sock] = topic
+            else:
+                sock = dedicated.pop(topic)
+                poller.unregister(sock)
+                del owner[sock]
+                sock.close(linger=0)
+
+        for topic in self.topics:
+            apply(zmq.SUBSCRIBE, topic)
+        changes = self._changes
+        try:
+            while not self._halt.is_set():
+                while changes:
+                    apply(*changes.popleft())
+                for sock, _ in poller.poll(100):      # wake up now and then to check _halt
+                    self._drain(sock, owner.get(sock))
+                if self.recorder is not None:
+                    self._record(None)
+        finally:
+            main.close(linger=0)
+            for sock in dedicated.values():
+                sock.close(linger=0)
+            if self.recorder is not None:
+                try:
+                    self.recorder.close()
+                except OSError:
+                    pass
+
+    def _drain(self, sock, conflated_topic=None):
+        inbox = self.inbox
+        while True:
+            try:
+                frames = sock.recv_multipart(zmq.NOBLOCK)
+            except zmq.Again:
+                break
+            now = time.perf_counter()
+            self.stats["received"] += 1
+            if self.recorder is not None:
+                self._record(frames)
+            topic = conflated_topic
+            if topic is None and len(frames) == 2:
+                topic = frames[0].partition(b":")[0].decode("ascii", "replace")
+            if topic in self.conflate:
+                if topic in self.latest:
+                    self.stats["coalesced"] += 1
+                self.latest[topic] = (now, frames)    # decoded later, only if still newest
+                continue
+            try:
+                record = (now, *decoder.decode_reading(frames))
+            except ValueError as e:     # includes UnicodeDecodeError
+                self.stats["dropped"] += 1
+                record = (now, None, str(e))
+            if len(inbox) == inbox.maxlen:
+                self.stats["dropped"] += 1
+            inbox.append(record)
+
+    def _record(self, frames):
+        """Write `frames` to the recorder (None: only sync if due); on OSError stop recording."""
+        try:
+            if frames is None:
+                self.recorder.maybe_sync()
+            else:
+                self.recorder.write(frames)
+        except OSError as e:
+            recorder, self.recorder = self.recorder, None
+            try:
+                recorder.close()
+            except OSError:
+                pass
+            self.inbox.append((time.perf_counter(), None, f"recording stopped: {e}"))
+
+    def stop(self):
+        self._halt.set()
@@ -0,0 +1,89 @@
+"""Cheap hover tooltips for time-series plots.
+
+mplcursors hit-tests every artist on every mouse move. Our lines are sorted
+by x (time), so the nearest sample is a binary search away; motion events
+are throttled, and only the annotation is redrawn (blitted over a cached
+background) rather than the whole figure.
+"""
+
+import time
+
+import numpy as np
+
+
+class NearestHover:
+    """Tooltip on the sample nearest the pointer, for lines sorted by x.
+
+    `background`, if given, returns the axes background the owner already
+    caches for blitting (LiveLine); otherwise one is cached on each draw.
+    """
+
+    def __init__(self, ax, lines, fmt=None, interval_s=0.05, radius_px=20, background=None):
+        self.ax = ax
+        self.lines = list(lines)
+        self.fmt = fmt or (lambda x, y: f"{y:.2f}")
+        self.interval_s = interval_s
+        self.radius_px = radius_px
+        self.annot = ax.annotate("", xy=(0, 0), xytext=(8, 8), textcoords="offset points", fontsize=7,
+                                 bbox=dict(boxstyle="round", fc="#FFFFE0", alpha=0.9), animated=True)
+        self.annot.set_visible(False)
+        self._background = None
+        self._owner_background = background
+        self._last_move = 0.0
+        ax.figure.canvas.mpl_connect("draw_event", self._on_draw)
+        ax.figure.canvas.mpl_connect("motion_notify_event", self._on_move)
+
+    def _on_draw(self, event):
+        if self._owner_background is None:
+            self._background = event.canvas.copy_from_bbox(self.ax.bbox)
+        self.draw()
+
+    def draw(self):
+        """Draw the annotation (if shown) into the current frame."""
+        if self.annot.get_visible():
+            self.ax.draw_artist(self.annot)
+
+    def nearest(self, x_px, y_px):
+        """(x, y) data of the closest sample within radius_px of the pointer, else None."""
+        to_px = self.ax.transData.transform
+        x = self.ax.transData.inverted().transform((x_px, y_px))[0]
+        best, best_d = None, self.radius_px
+        for line in self.lines:
+            xs = line.get_xdata(orig=False)     # unit-converted floats, cached by the line
+            ys = line.get_ydata(orig=False)
+            i = int(np.searchsorted(xs, x))
+            for j in (i - 1, i):
+                if 0 <= j < len(xs):
+                    px, py = to_px((xs[j], ys[j]))
+                    d = np.hypot(px - x_px, py - y_px)
+                    if d < best_d:
+                        best, best_d = (xs[j], ys[j]), d
+        return best
+
+    def _on_move(self, event):
+        now = time.perf_counter()
+        if now - self._last_move < self.interval_s:
+            return
+        self._last_move = now
+        hit = self.nearest(event.x, event.y) if event.inaxes is self.ax else None
+        if hit is None and not self.annot.get_visible():
+            return
+        if hit is not None:
+            self.annot.xy = hit
+            self.annot.set_text(self.fmt(*hit))
+        self.annot.set_visible(hit is not None)
+        self._blit()
+
+    def _blit(self):
+        canvas = self.ax.figure.canvas
+        background = self._owner_background() if self._owner_background else self._background
+        if background is None:
+            canvas.draw_idle()
+            return
+        canvas.restore_region(background)
+        # animated lines (LiveLine blit mode) are not part of the background
+        for line in self.lines:
+            if line.get_animated():
+                self.ax.draw_artist(line)
+        self.draw()
+        canvas.blit(self.ax.bbox)
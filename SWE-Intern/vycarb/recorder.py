@@ -0,0 +1,133 @@
+"""Append-only recorder for the live ZMQ feed.
+
+Every message the GUI receives is appended, still encoded, to a segment file
+in the recording directory. Nothing is decoded or re-encoded, so the cost on
+the receiver thread is one buffered write. Segments are rotated by size and
+by age, and the oldest are deleted once all of them together exceed
+max_total_bytes. fsync runs after a batch of records or after a time
+interval, so durability versus disk load is a setting.
+
+Segment layout: MAGIC, then one record per message:
+
+    RECORD header  wall time (float64), frame count (1 or 2),
+                   topic frame length, payload length
+    topic frame    (absent for single-frame "topic|{json}" messages)
+    payload
+
+read_segments() gives back (wall_time, frames) in the form decoder.decode()
+takes. A record cut short by a crash ends that segment cleanly.
+"""
+
+import os
+import struct
+import time
+from datetime import datetime
+from pathlib import Path
+
+MAGIC = b"VYREC001"
+RECORD = struct.Struct("<dBHI")
+SEGMENT_SUFFIX = ".seg"
+
+
+class Recorder:
+    """Writes raw ZMQ messages to rotating segment files. Not thread-safe: one writer thread."""
+
+    def __init__(self, directory, max_bytes=64 << 20, max_age_s=3600, fsync_every=1000, fsync_interval_s=1.0,
+                 max_total_bytes=2 << 30):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self.max_total_bytes = max_total_bytes      # None keeps every segment
+        self.fsync_every = fsync_every
+        self.fsync_interval_s = fsync_interval_s
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._file = None
+        self._opened = 0.0
+        self._size = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._seq = 0
+
+    def write(self, frames, wall_time=None):
+        if len(frames) == 1:
+            topic, payload = b"", frames[0]
+        else:
+            topic, payload = frames[0], frames[1]
+        if self._file is None or self._size >= self.max_bytes or time.monotonic() - self._opened >= self.max_age_s:
+            self._rotate()
+        header = RECORD.pack(time.time() if wall_time is None else wall_time, len(frames), len(topic), len(payload))
+        self._file.write(header)
+        self._file.write(topic)
+        self._file.write(payload)
+        self._size += RECORD.size + len(topic) + len(payload)
+        self._unsynced += 1
+        self.maybe_sync()
+
+    def maybe_sync(self):
+        """fsync if a batch is full or the interval has passed (call it now and then when idle)."""
+        if not self._unsynced:
+            return
+        if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval_s:
+            self.sync()
+
+    def sync(self):
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    def _rotate(self):
+        self.close()
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        self._seq += 1
+        path = self.directory / f"session-{stamp}-{self._seq:04d}{SEGMENT_SUFFIX}"
+        self._file = open(path, "wb", buffering=1 << 16)
+        self._file.write(MAGIC)
+        self._size = len(MAGIC)
+        self._opened = time.monotonic()
+        self._prune(keep=path)
+
+    def _prune(self, keep):
+        """Delete the oldest segments until all of them fit in max_total_bytes."""
+        if self.max_total_bytes is None:
+            return
+        sizes = [(path, path.stat().st_size) for path in segment_paths(self.directory) if path != keep]
+        total = sum(size for _, size in sizes) + self.max_bytes    # room for the segment just opened
+        for path, size in sizes:
+            if total <= self.max_total_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+def segment_paths(source):
+    """A segment file, or every segment in a directory, oldest first."""
+    source = Path(source)
+    if source.is_dir():
+        return sorted(source.glob("*" + SEGMENT_SUFFIX))
+    return [source]
+
+
+def read_segments(source):
+    """Yield (wall_time, frames) for every recorded message in `source`."""
+    for path in segment_paths(source):
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a recorder segment")
+            while True:
+                header = f.read(RECORD.size)
+                if len(header) < RECORD.size:
+                    break
+                wall_time, count, topic_len, payload_len = RECORD.unpack(header)
+                topic = f.read(topic_len)
+                payload = f.read(payload_len)
+                if len(topic) < topic_len or len(payload) < payload_len:
+                    break       # torn write at the end of a segment
+                yield wall_time, ([payload] if count == 1 else [topic, payload])
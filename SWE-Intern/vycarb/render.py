@@ -0,0 +1,511 @@
+"""Rendering layer of the live GUI.
+
+LiveLine keeps hours of samples in preallocated ring buffers and draws a
+per-pixel min/max envelope of them, optionally blitting only the line over a
+cached background. RenderScheduler redraws dirty LiveLines at a capped frame
+rate. ItemCache and TerminalPane keep Tk text updates to what changed, once
+per tick. Nothing here creates a Tk window: with master=None the figures get
+a plain Agg canvas, which is how bench.py runs them.
+"""
+
+import collections
+import logging
+import logging.handlers
+import queue
+import time
+import traceback
+from datetime import datetime
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.ticker import FuncFormatter, MaxNLocator
+
+from .hover import NearestHover
+
+# Preallocated circular buffer for LiveLine samples
+class RingBuffer:
+    """Fixed-capacity float buffer whose newest samples are always contiguous.
+
+    Every sample is written twice (at i and i + capacity), so view() is a
+    plain slice of the backing array: no copy and no np.roll per push.
+    """
+
+    def __init__(self, capacity, dtype=np.float64):
+        self.capacity = capacity
+        self._data = np.zeros(2 * capacity, dtype=dtype)
+        self._head = 0      # next write slot in [0, capacity)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def append(self, value):
+        i = self._head
+        self._data[i] = value
+        self._data[i + self.capacity] = value
+        self._head = (i + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=self._data.dtype)
+        cap = self.capacity
+        if len(values) >= cap:
+            values = values[-cap:]
+            self._data[:cap] = values
+            self._data[cap:] = values
+            self._head = 0
+            self._size = cap
+            return
+        idx = (self._head + np.arange(len(values))) % cap
+        self._data[idx] = values
+        self._data[idx + cap] = values
+        self._head = (self._head + len(values)) % cap
+        self._size = min(self._size + len(values), cap)
+
+    def view(self):
+        """Oldest-to-newest samples as a view into the backing array."""
+        start = (self._head - self._size) % self.capacity
+        return self._data[start:start + self._size]
+
+    def drop_front(self, count):
+        """Forget the `count` oldest samples in O(1)."""
+        self._size -= min(count, self._size)
+
+    def resize(self, capacity):
+        """Change capacity, keeping the newest samples (one O(n) copy)."""
+        kept = self.view()[-capacity:].copy()
+        self.__init__(capacity, self._data.dtype)
+        self.extend(kept)
+
+
+# Per-pixel min/max envelope so plotting cost follows widget width, not history length
+class MinMaxDecimator:
+    """Min/max of a time series in fixed-width time buckets (one per pixel column).
+
+    New samples only touch the newest bucket and expired buckets fall off the
+    front, so keeping the envelope current is O(1) per sample and drawing it
+    is O(width) however many hours of samples the LiveLine holds.
+    """
+
+    def __init__(self, bucket_s):
+        self.bucket_s = bucket_s
+        self.buckets = collections.deque()   # [key, lo, hi], oldest first
+
+    def __len__(self):
+        return len(self.buckets)
+
+    def add(self, ts, ys):
+        buckets = self.buckets
+        for t, y in zip(ts, ys):
+            key = int(t // self.bucket_s)
+            if buckets and buckets[-1][0] == key:
+                bucket = buckets[-1]
+                if y < bucket[1]:
+                    bucket[1] = y
+                elif y > bucket[2]:
+                    bucket[2] = y
+            else:
+                buckets.append([key, y, y])
+
+    def evict(self, cutoff):
+        key = int(cutoff // self.bucket_s)
+        while self.buckets and self.buckets[0][0] < key:
+            self.buckets.popleft()
+
+    def trim(self, ts, ys):
+        """Match the envelope to the samples still kept (time-sorted `ts`, `ys`).
+
+        Buckets before ts[0] are dropped and the one ts[0] falls in is
+        recomputed, so samples that left the buffer early (capacity) or
+        late within a bucket no longer widen the envelope.
+        """
+        self.evict(ts[0])
+        if self.buckets and self.buckets[0][0] == int(ts[0] // self.bucket_s):
+            end = np.searchsorted(ts, (self.buckets[0][0] + 1) * self.bucket_s)
+            head = ys[:end]
+            self.buckets[0][1], self.buckets[0][2] = float(head.min()), float(head.max())
+
+    def rebuild(self, ts, ys):
+        self.buckets.clear()
+        self.add(ts, ys)
+
+    def xy(self):
+        """Two points (min, max) per bucket, at the bucket centre."""
+        arr = np.array(self.buckets, dtype=np.float64).reshape(-1, 3)
+        xs = np.repeat((arr[:, 0] + 0.5) * self.bucket_s, 2)
+        ys = np.empty(2 * len(arr))
+        ys[0::2] = arr[:, 1]
+        ys[1::2] = arr[:, 2]
+        return xs, ys
+
+
+# Running y-range of a LiveLine window, so autoscale never rescans the data
+class SlidingMinMax:
+    """Min and max over a time window with monotonic deques, O(1) amortized per sample."""
+
+    def __init__(self):
+        self._lows = collections.deque()    # (t, y), y increasing: front is the min
+        self._highs = collections.deque()   # (t, y), y decreasing: front is the max
+
+    def add(self, t, y):
+        while self._lows and self._lows[-1][1] >= y:
+            self._lows.pop()
+        self._lows.append((t, y))
+        while self._highs and self._highs[-1][1] <= y:
+            self._highs.pop()
+        self._highs.append((t, y))
+
+    def evict(self, cutoff):
+        """Forget samples older than `cutoff`."""
+        while self._lows and self._lows[0][0] < cutoff:
+            self._lows.popleft()
+        while self._highs and self._highs[0][0] < cutoff:
+            self._highs.popleft()
+
+    def clear(self):
+        self._lows.clear()
+        self._highs.clear()
+
+    def bounds(self):
+        if not self._lows:
+            return None
+        return self._lows[0][1], self._highs[0][1]
+
+
+def fmt_clock(x, pos=None):
+    """Epoch seconds -> HH:MM:SS (also a matplotlib tick formatter)."""
+    return datetime.fromtimestamp(x).strftime("%H:%M:%S")
+
+def make_canvas(fig, master, x, y, w, h):
+    """Tk canvas placed at x/y/w/h in `master`; with no master, a headless Agg canvas."""
+    if master is None:
+        return FigureCanvasAgg(fig)
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+    canvas = FigureCanvasTkAgg(fig, master=master)
+    canvas.get_tk_widget().place(x=x, y=y, width=w, height=h)
+    return canvas
+
+# Several LiveLines in one Figure / one Tk canvas (one Agg buffer, one photo image)
+class SharedFigure:
+    def __init__(self, master, x, y, w, h, nrows=1, ncols=1, **gridspec_kw):
+        self.fig = Figure(figsize=(w/100, h/100), dpi=100)
+        self.grid = self.fig.add_gridspec(nrows, ncols, **gridspec_kw)
+        self.canvas = make_canvas(self.fig, master, x, y, w, h)
+
+    def add_line(self, row, col, **kwargs):
+        return LiveLine(None, host=self, cell=self.grid[row, col], **kwargs)
+
+
+# Small helper: create an embedded Matplotlib figure
+class LiveLine:
+    """Rolling (timestamp, value) plot covering the last `window_s` seconds.
+
+    Normally owns a Figure placed at x/y/w/h in `master` (headless if master
+    is None); with `host` (a SharedFigure) it draws into grid cell `cell` of
+    the host's figure instead.
+    """
+
+    PAN_STEP = 0.1   # blit mode: x-axis jumps ahead by this fraction of the window
+    RESTART_S = 300  # a timestamp this far behind the newest starts a new window; closer ones are dropped
+
+    def __init__(self, master, x=0, y=0, w=0, h=0, title="", ylabel="", maxlen=60, scheduler=None,
+                 blit=False, ylim_hysteresis=0.25, window_s=600, host=None, cell=None):
+        self.scheduler = scheduler
+        self.blit = blit
+        self.window_s = window_s
+        self.ylim_hysteresis = ylim_hysteresis
+        self.background = None
+        self.full_redraws = 0
+        self._xlim = (0.0, -1.0)   # empty until the first sample
+        self._front = None         # oldest kept timestamp the envelope was trimmed to
+        self.buffer_t = RingBuffer(maxlen)
+        self.buffer_y = RingBuffer(maxlen)
+        self.y_range = SlidingMinMax()
+        if host is None:
+            self.fig = Figure(figsize=(w/100, h/100), dpi=100)
+            self.ax = self.fig.add_subplot(111)
+            self.canvas = make_canvas(self.fig, master, x, y, w, h)
+        else:
+            self.fig = host.fig
+            self.ax = self.fig.add_subplot(cell)
+            self.canvas = host.canvas
+        # full-resolution history stays in the ring buffers; this is what gets drawn,
+        # one bucket per pixel column of the axes
+        self.decimator = MinMaxDecimator(window_s * (1 + self.PAN_STEP) / max(1.0, self.ax.bbox.width))
+        self.ax.set_title(title, fontsize=8)
+        self.ax.set_ylabel(ylabel, fontsize=8)
+        self.ax.tick_params(labelsize=7)
+        self.ax.grid(True, alpha=0.3)
+        self.ax.xaxis.set_major_locator(MaxNLocator(3))
+        self.ax.xaxis.set_major_formatter(FuncFormatter(fmt_clock))
+        (self.line,) = self.ax.plot([], [], lw=1.5)
+        if blit:
+            # the line is drawn by hand on top of a cached background
+            self.line.set_animated(True)
+            self.canvas.mpl_connect("draw_event", self._on_draw)
+        # hover tooltip: binary search on the drawn (time-sorted) data, annotation-only redraws
+        self.hover = NearestHover(self.ax, [self.line], fmt=lambda x, y: f"{fmt_clock(x)}  {y:.2f}",
+                                  background=(lambda: self.background) if blit else None)
+
+    def push(self, y, t=None):
+        self.extend([y], None if t is None else [t])
+
+    def extend(self, ys, ts=None):
+        # append a whole batch of (ts[i], ys[i]) samples; drawing is left to the scheduler
+        if ts is None:
+            ts = [time.time()] * len(ys)
+        ts = np.asarray(ts, dtype=np.float64)
+        ys = np.asarray(ys, dtype=np.float64)
+        finite = np.isfinite(ts) & np.isfinite(ys)     # missing sensor values arrive as NaN
+        if not finite.all():
+            ts, ys = ts[finite], ys[finite]
+        if not len(ts):
+            return
+        # the window only moves forward
+        kept = self.buffer_t.view()
+        newest = kept[-1] if len(kept) else ts[0]
+        if ts[0] < newest or (len(ts) > 1 and (np.diff(ts) < 0).any()):
+            ts, ys = self._reorder(ts, ys, newest)
+            if not len(ts):
+                return
+        self.buffer_t.extend(ts)
+        self.buffer_y.extend(ys)
+        ts, ys = ts.tolist(), ys.tolist()
+        self.decimator.add(ts, ys)
+        for t, y in zip(ts, ys):
+            self.y_range.add(t, y)
+        self._evict()
+        self._changed()
+
+    def _reorder(self, ts, ys, newest):
+        """Drop samples slightly older than the newest (jitter, mixed clocks); a jump
+        back of more than RESTART_S (an HH:MM:SS feed past midnight, a replay
+        started over) clears the plot and begins a new window."""
+        keep = np.ones(len(ts), dtype=bool)
+        start = 0
+        for i, t in enumerate(ts.tolist()):
+            if t >= newest:
+                newest = t
+            elif newest - t > self.RESTART_S:
+                self.clear()
+                keep[:i] = False
+                start, newest = i, t
+            else:
+                keep[i] = False
+        keep[:start] = False
+        return ts[keep], ys[keep]
+
+    def clear(self):
+        """Forget every sample (the next one starts a new window)."""
+        self.buffer_t.drop_front(len(self.buffer_t))
+        self.buffer_y.drop_front(len(self.buffer_y))
+        self.decimator.rebuild([], [])
+        self.y_range.clear()
+        self._xlim = (0.0, -1.0)
+        self._front = None
+
+    def _evict(self):
+        # timestamps are increasing, so expired samples are always at the front;
+        # each sample is skipped over once, O(1) amortized
+        ts = self.buffer_t.view()
+        if not len(ts):
+            return
+        cutoff = ts[-1] - self.window_s
+        k = 0
+        while k < len(ts) and ts[k] < cutoff:
+            k += 1
+        if k:
+            self.buffer_t.drop_front(k)
+            self.buffer_y.drop_front(k)
+        # the envelope and y-range follow the buffer, which also covers samples
+        # pushed out by the ring buffer's capacity
+        ts = self.buffer_t.view()
+        if ts[0] != self._front:
+            self._front = ts[0]
+            self.decimator.trim(ts, self.buffer_y.view())
+            self.y_range.evict(ts[0])
+
+    def set_maxlen(self, maxlen):
+        """Grow (or shrink) the number of points kept inside the time window."""
+        self.buffer_t.resize(maxlen)
+        self.buffer_y.resize(maxlen)
+        self.decimator.rebuild(self.buffer_t.view(), self.buffer_y.view())
+        self.y_range.clear()
+        for t, y in zip(self.buffer_t.view(), self.buffer_y.view()):
+            self.y_range.add(t, y)
+        self._changed()
+
+    def _changed(self):
+        if self.scheduler is not None:
+            self.scheduler.mark_dirty(self)
+        else:
+            self.render()
+
+    def render(self):
+        ts = self.buffer_t.view()
+        ys = self.buffer_y.view()
+        if not len(ys):
+            return
+        newest = ts[-1]
+        if len(ys) > 2 * len(self.decimator):
+            # more samples than pixel columns: draw the min/max envelope instead
+            ts, ys = self.decimator.xy()
+        self.line.set_data(ts, ys)
+        bounds = self.y_range.bounds()
+        rescaled = bounds is not None and self._rescale_y(*bounds)
+        if not self.blit:
+            self.ax.set_xlim(newest - self.window_s, newest)
+            self.canvas.draw_idle()
+            return
+        panned = self._pan_x(newest)
+        if rescaled or panned:
+            # limits moved: full redraw, _on_draw re-caches the background
+            self.full_redraws += 1
+            self.canvas.draw()
+        elif self.background is None:
+            self.canvas.draw()
+        else:
+            self.canvas.restore_region(self.background)
+            self.ax.draw_artist(self.line)
+            self.hover.draw()
+            self.canvas.blit(self.ax.bbox)
+
+    def _pan_x(self, newest):
+        """Shift the x-window ahead in PAN_STEP jumps instead of on every sample."""
+        lo, hi = self._xlim
+        if lo <= newest <= hi:
+            return False
+        self._xlim = (newest - self.window_s, newest + self.window_s * self.PAN_STEP)
+        self.ax.set_xlim(*self._xlim)
+        return True
+
+    def _rescale_y(self, lo, hi):
+        """Set new y-limits only when the data leaves them or uses too little of them."""
+        cur_lo, cur_hi = self.ax.get_ylim()
+        span = (hi - lo) or abs(hi) or 1.0
+        inside = cur_lo <= lo and hi <= cur_hi
+        if inside and (cur_hi - cur_lo) <= span * (1 + 4 * self.ylim_hysteresis):
+            return False
+        pad = span * self.ylim_hysteresis
+        self.ax.set_ylim(lo - pad, hi + pad)
+        return True
+
+    def _on_draw(self, event):
+        # static parts (axes, ticks, grid, title) were just rendered
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.ax.draw_artist(self.line)
+
+
+# Redraws dirty LiveLines at a capped frame rate, independent of ingest rate
+RENDER_FPS = 10
+
+class RenderScheduler:
+    def __init__(self, window, fps=RENDER_FPS, on_frame=None):
+        self.window = window
+        self.on_frame = on_frame     # called after every frame with the LiveLines it drew
+        self.interval_ms = max(1, int(1000 / fps))
+        self.dirty = {}          # insertion-ordered set of LiveLines waiting for a redraw
+        self.frames = 0
+        self.errors = 0          # failed LiveLine.render() calls
+        self._failed = set()     # LiveLines whose traceback has been printed once
+
+    def mark_dirty(self, live_line):
+        self.dirty[live_line] = None
+
+    def start(self):
+        self.window.after(self.interval_ms, self._tick)
+
+    def render_dirty(self):
+        """Redraw every LiveLine marked since the last frame; returns them."""
+        dirty, self.dirty = self.dirty, {}
+        for live_line in dirty:
+            try:
+                live_line.render()
+            except Exception:
+                # one broken plot must not stop the others; report it once
+                self.errors += 1
+                if live_line not in self._failed:
+                    self._failed.add(live_line)
+                    traceback.print_exc()
+        if dirty:
+            self.frames += 1
+        return list(dirty)
+
+    def _tick(self):
+        try:
+            drawn = self.render_dirty()
+            if self.on_frame is not None:
+                self.on_frame(drawn)
+        finally:
+            self.window.after(self.interval_ms, self._tick)
+
+
+# Last options sent to each canvas item, so unchanged readouts cost Tk nothing
+class ItemCache:
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.state = collections.defaultdict(dict)
+
+    def set(self, item_id, **options):
+        """canvas.itemconfig(item_id, **options), skipped when nothing would change."""
+        state = self.state[item_id]
+        changed = {k: v for k, v in options.items() if state.get(k) != v}
+        if changed:
+            self.canvas.itemconfig(item_id, **changed)
+            state.update(changed)
+
+
+# Terminal pane: one insert per tick, newest max_lines kept, every line also logged to a file
+class TerminalPane:
+    """Batched Tk text output, optionally mirrored to a size-capped log file.
+
+    The log file (log_path, None for none) is written by a logging
+    QueueListener thread, never by Tk, and rotated at log_bytes with
+    log_backups old files kept.
+    """
+
+    def __init__(self, text_widget, log_path, max_lines=5000, lines=0, log_bytes=10 << 20, log_backups=2):
+        self.text = text_widget
+        self.max_lines = max_lines
+        self.pending = []       # lines queued since the last flush
+        self.lines = lines      # lines currently in the widget
+        self.log = None
+        self._listener = None
+        if log_path is not None:
+            handler = logging.handlers.RotatingFileHandler(log_path, maxBytes=log_bytes,
+                                                           backupCount=log_backups, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self.log = queue.SimpleQueue()
+            self._listener = logging.handlers.QueueListener(self.log, handler)
+            self._listener.start()
+
+    def print(self, ts, topic, device, msg_type, status, short):
+        line = f"{ts} | {topic:<5} | {device:<8} | {msg_type:<9} | {status:<7} | {short}"
+        self.pending.append(line)
+
+    def flush(self):
+        """Insert everything queued since the last frame in one go, then trim the top."""
+        if not self.pending:
+            return
+        if self.log is not None:
+            self.log.put(logging.makeLogRecord({"msg": "\n".join(self.pending)}))
+        shown = self.pending[-self.max_lines:]
+        self.pending.clear()
+        self.text.configure(state="normal")
+        self.text.insert("end", "\n".join(shown) + "\n")
+        self.lines += len(shown)
+        if self.lines > self.max_lines:
+            extra = self.lines - self.max_lines
+            self.text.delete("1.0", f"{extra + 1}.0")
+            self.lines = self.max_lines
+        self.text.see("end")
+        self.text.configure(state="disabled")
+
+    def close(self):
+        """Write out what is still queued and close the log file."""
+        if self._listener is not None:
+            self._listener.stop()
+            for handler in self._listener.handlers:
+                handler.close()
+            self._listener = None
@@ -0,0 +1,160 @@
+"""Routes decoded feed records to the live plots and readouts.
+
+Router.step() runs once per Tk tick: it drains what the Receiver queued
+(within a time and message budget), batches every plotted sample per
+LiveLine so each widget is touched once per frame, and writes only the
+newest data of each device to the StateStore the readouts read from. It
+needs no Tk window, so bench.py can drive it directly.
+
+Data from known devices arrives as typed Readings (see state.py); plot
+routes name the attribute to plot ("d1.ph", "dosing_rate") and are compiled
+to attrgetters once, instead of walking nested dicts for every sample.
+"""
+
+import collections
+import operator
+import time
+from datetime import datetime
+
+from . import decoder
+from .render import fmt_clock
+from .state import Reading, StateStore
+
+# Ingest budget: drain everything pending each tick, but never hog the Tk loop
+MAX_MSGS_PER_TICK = 2000
+MAX_MS_PER_TICK = 25
+
+
+def summarize(device, data):
+    """Pretty, compact summary for terminal (messages that did not become a Reading)"""
+    short = ""
+    if device == "di-sea":
+        d1 = data.get("di-sea_1", {})
+        d2 = data.get("di-sea_2", {})
+        short = f"d1 T={d1.get('temp',0):.2f}°C psi={d1.get('psi',0):.2f} | d2 T={d2.get('temp',0):.2f}°C psi={d2.get('psi',0):.2f}"
+    elif device == "doser":
+        short = f"rate={data.get('dosing_rate',0):.2f}"
+    elif device == "reactor":
+        short = f"flow={data.get('flow',0):.0f} L/min"
+    elif device == "battery":
+        short = f"soc={data.get('soc',0):.0f}"
+    elif device == "ve_direct":
+        short = f"yield_total={data.get('yield_total',0):.2f}"
+    return short
+
+
+class Router:
+    """Feed records -> LiveLines (every sample) and a StateStore (newest per device).
+
+    plot_routes: device -> [(LiveLine, attribute path of its Reading, e.g. "d1.ph")]
+    on_update(device): called once per tick for each device the store got new data for
+    on_line(ts, kind, device, msg_type, status, summary): one call per record (terminal)
+    """
+
+    def __init__(self, receiver, plot_routes, store=None, on_update=None, on_line=None,
+                 max_msgs=MAX_MSGS_PER_TICK, max_ms=MAX_MS_PER_TICK):
+        self.receiver = receiver
+        self.plot_routes = {device: [(line, operator.attrgetter(path)) for line, path in routes]
+                            for device, routes in plot_routes.items()}
+        self.stats = {"coalesced": 0, "dropped": 0}     # Tk-side counts; the receiver keeps its own
+        self.store = store if store is not None else StateStore()
+        self.on_update = on_update
+        self.on_line = on_line
+        self.max_msgs = max_msgs
+        self.max_ms = max_ms
+
+    def totals(self):
+        """Receiver and router counters added up (each dict has a single writer thread)."""
+        totals = dict(self.receiver.stats)
+        for key, count in self.stats.items():
+            totals[key] = totals.get(key, 0) + count
+        return totals
+
+    def take_conflated(self):
+        """Decode the newest message of each conflated topic (see Receiver.latest)."""
+        records = []
+        latest = self.receiver.latest
+        for topic in list(latest):
+            recv_time, frames = latest.pop(topic)
+            try:
+                records.append((recv_time, *decoder.decode_reading(frames)))
+            except ValueError as e:
+                self.stats["dropped"] += 1
+                records.append((recv_time, None, str(e)))
+        return records
+
+    def drain(self):
+        """Pop every record the receiver has queued (within the tick budget).
+
+        Returns the latest Reading per device, every sample received this tick
+        per LiveLine, and the receive time of each record for latency tracking.
+        """
+        latest = {}
+        samples = collections.defaultdict(lambda: ([], []))   # LiveLine -> (timestamps, values)
+        recv_times = []
+        inbox = self.receiver.inbox
+        on_line = self.on_line
+        conflated = self.take_conflated()
+        deadline = time.perf_counter() + self.max_ms / 1000
+        for _ in range(self.max_msgs):
+            if conflated:
+                recv_time, topic, obj = conflated.pop()
+            else:
+                try:
+                    recv_time, topic, obj = inbox.popleft()
+                except IndexError:
+                    break
+            recv_times.append(recv_time)
+            if topic is None:
+                if on_line:
+                    on_line(datetime.now().strftime("%H:%M:%S"), "err", "gui", "feed", "error", obj)
+                continue
+            try:
+                self._route(topic, obj, latest, samples)
+            except Exception as e:
+                # a malformed record costs only itself, not the rest of the tick
+                self.stats["dropped"] += 1
+                if on_line:
+                    on_line(datetime.now().strftime("%H:%M:%S"), "err", "gui", "route", "error",
+                            f"{topic}: {type(e).__name__}: {e}")
+
+            if time.perf_counter() >= deadline and not conflated:
+                break
+        return latest, samples, recv_times
+
+    def _route(self, topic, obj, latest, samples):
+        """Print one decoded record and add it to this tick's latest/samples."""
+        on_line = self.on_line
+        kind = topic.partition(".")[0]            # "data.di-sea" -> "data"
+        if not isinstance(obj, Reading):
+            # logs, or data from a device without a Reading: printed, nothing to plot
+            if on_line:
+                device = obj.get("device_name", "")
+                ts = obj.get("timestamp") or datetime.now().strftime("%H:%M:%S")
+                if isinstance(ts, (int, float)):      # struct-encoded feeds send epoch seconds
+                    ts = fmt_clock(ts)
+                on_line(ts, kind, device, obj.get("msg_type", ""), obj.get("status", ""),
+                        summarize(device, obj.get("data") or {}))
+            return
+        device, t = obj.device, obj.timestamp
+        values = [(line, get(obj)) for line, get in self.plot_routes.get(device, ())]
+        if on_line:
+            on_line(fmt_clock(t), kind, device, obj.msg_type, obj.status, obj.summary())
+        if device in latest:
+            self.stats["coalesced"] += 1
+        latest[device] = obj
+        for line, y in values:
+            ts_list, ys = samples[line]
+            ts_list.append(t)
+            ys.append(y)
+
+    def step(self):
+        """One tick: drain, feed the LiveLines, update the store. Returns the receive times handled."""
+        latest, samples, recv_times = self.drain()
+        for line, (ts_list, ys) in samples.items():
+            line.extend(ys, ts_list)
+        for device, reading in latest.items():
+            self.store.update(reading)
+            if self.on_update is not None:
+                self.on_update(device)
+        return recv_times
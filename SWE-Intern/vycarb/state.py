@@ -0,0 +1,162 @@
+"""Typed device readings and the store of the newest one per device.
+
+The receiver thread turns each data message into a Reading once (see
+decoder.decode_reading); the router, the readouts and the terminal then read
+attributes instead of walking the nested payload dicts again. Readings use
+__slots__, so the records queued in the inbox are a fraction of the size of
+the dicts they replace.
+"""
+
+import math
+
+PERIPHERALS = ("reactor", "doser", "di-sea")   # devices listed under Peripheral Status
+
+
+class Reading:
+    """Common header of every device reading; subclasses list their FIELDS (name -> default)."""
+
+    __slots__ = ("timestamp", "status", "msg_type")
+    device = ""
+    FIELDS = {}
+
+    def __init__(self, timestamp=0.0, status="", msg_type="", **values):
+        self.timestamp = timestamp      # epoch seconds
+        self.status = status
+        self.msg_type = msg_type
+        for name, default in self.FIELDS.items():
+            setattr(self, name, values.get(name, default))
+
+    @classmethod
+    def from_data(cls, data, timestamp, status="", msg_type=""):
+        """Build from a payload's "data" dict; missing fields get their defaults."""
+        reading = cls.__new__(cls)
+        reading.timestamp = timestamp
+        reading.status = status
+        reading.msg_type = msg_type
+        for name, default in cls.FIELDS.items():
+            setattr(reading, name, type(default)(data.get(name, default)))
+        return reading
+
+    def summary(self):
+        return ""
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.FIELDS)
+        return f"{type(self).__name__}({fields})"
+
+
+class DiSeaSensor:
+    """One di-sea logger's values (there are two per DiSeaReading).
+
+    A logger missing from the message is not `reported` and reads NaN, which
+    the plots skip, instead of zeros.
+    """
+
+    __slots__ = ("reported", "temp", "air_temp", "psi", "ph", "co2", "cycle")
+    FIELDS = {"temp": 0.0, "air_temp": 0.0, "psi": 0.0, "ph": 0.0, "co2": 0.0, "cycle": 1}
+
+    def __init__(self, data=None):
+        self.reported = bool(data)
+        if not data:
+            self.temp = self.air_temp = self.psi = self.ph = self.co2 = math.nan
+            self.cycle = 1
+            return
+        # spelled out rather than looped over FIELDS: this runs twice per di-sea message
+        get = data.get
+        self.temp = float(get("temp", 0.0))
+        self.air_temp = float(get("air_temp", 0.0))
+        self.psi = float(get("psi", 0.0))
+        self.ph = float(get("ph", 0.0))
+        self.co2 = float(get("co2", 0.0))
+        self.cycle = int(get("cycle", 1))
+
+
+class DiSeaReading(Reading):
+    __slots__ = ("d1", "d2")
+    device = "di-sea"
+
+    def __init__(self, timestamp=0.0, status="", msg_type="", d1=None, d2=None):
+        super().__init__(timestamp, status, msg_type)
+        self.d1 = d1 or DiSeaSensor()
+        self.d2 = d2 or DiSeaSensor()
+
+    @classmethod
+    def from_data(cls, data, timestamp, status="", msg_type=""):
+        reading = cls.__new__(cls)
+        reading.timestamp = timestamp
+        reading.status = status
+        reading.msg_type = msg_type
+        reading.d1 = DiSeaSensor(data.get("di-sea_1"))
+        reading.d2 = DiSeaSensor(data.get("di-sea_2"))
+        return reading
+
+    def summary(self):
+        return " | ".join(f"{name} T={d.temp:.2f}°C psi={d.psi:.2f}"
+                          for name, d in (("d1", self.d1), ("d2", self.d2)) if d.reported)
+
+    def __repr__(self):
+        return f"DiSeaReading(d1={_slots(self.d1)}, d2={_slots(self.d2)})"
+
+
+class DoserReading(Reading):
+    __slots__ = ("dosing_rate",)
+    device = "doser"
+    FIELDS = {"dosing_rate": 0.0}
+
+    def summary(self):
+        return f"rate={self.dosing_rate:.2f}"
+
+
+class ReactorReading(Reading):
+    __slots__ = ("flow",)
+    device = "reactor"
+    FIELDS = {"flow": 0.0}
+
+    def summary(self):
+        return f"flow={self.flow:.0f} L/min"
+
+
+class BatteryReading(Reading):
+    __slots__ = ("soc",)
+    device = "battery"
+    FIELDS = {"soc": 0.0}
+
+    def summary(self):
+        return f"soc={self.soc:.0f}"
+
+
+class VeDirectReading(Reading):
+    __slots__ = ("yield_total",)
+    device = "ve_direct"
+    FIELDS = {"yield_total": 0.0}
+
+    def summary(self):
+        return f"yield_total={self.yield_total:.2f}"
+
+
+READINGS = {cls.device: cls
+            for cls in (DiSeaReading, DoserReading, ReactorReading, BatteryReading, VeDirectReading)}
+
+
+def _slots(obj):
+    return {name: getattr(obj, name) for name in obj.__slots__}
+
+
+class StateStore:
+    """device -> newest Reading, plus which peripherals have reported since start."""
+
+    def __init__(self):
+        self.latest = {}
+        self.online = {device: False for device in PERIPHERALS}
+
+    def update(self, reading):
+        device = reading.device
+        self.latest[device] = reading
+        if device in self.online:
+            self.online[device] = True
+
+    @property
+    def cycle(self):
+        """Current cycle number, as reported by di-sea 1."""
+        reading = self.latest.get("di-sea")
+        return reading.d1.cycle if reading is not None and reading.d1.reported else 1